@@ -3,7 +3,6 @@
 
 import asyncio
 import logging
-import json
 import sys
 import aiohttp
 
@@ -33,7 +32,7 @@ async def main(loop, host):
             device_inverter=["1"],
         )
         for r in res:
-            print(json.dumps(r, indent=4))
+            print(fronius.dumps(r, indent=True).decode())
 
 
 if __name__ == "__main__":
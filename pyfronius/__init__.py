@@ -6,27 +6,94 @@ Created on 27.09.2017
 """
 
 import asyncio
+import codecs
+import copy
 import enum
-import json
+import functools
 import logging
+import math
+import os
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, nullcontext
 from html import unescape
-from typing import Any, Callable, Dict, Final, Iterable, List, Tuple, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    ContextManager,
+    Deque,
+    Dict,
+    Final,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import aiohttp
 
-from .const import INVERTER_DEVICE_TYPE, OHMPILOT_STATE_CODES
+from .codec import JsonCodec, json_codec
+from .const import (  # noqa: F401
+    AMPERE,
+    DEGREE_CELSIUS,
+    HERTZ,
+    INVERTER_DEVICE_TYPE,
+    INVERTER_IDLE_STATES,
+    INVERTER_IDLE_STATUS_CODES,
+    OHMPILOT_STATE_CODES,
+    PERCENT,
+    VOLT,
+    VOLTAMPERE,
+    VOLTAMPEREREACTIVE,
+    VOLTAMPEREREACTIVE_HOUR,
+    WATT,
+    WATT_HOUR,
+)
+from .metrics import (  # noqa: F401
+    LATENCY_BUCKETS,
+    PROFILE_STAGES,
+    REQUEST_STAGES,
+    EndpointStats,
+    LatencyHistogram,
+    StageProfile,
+    prometheus_text,
+)
+from .records import (  # noqa: F401
+    LOGGER_INFO_FIELDS,
+    METER_FIELDS,
+    OHMPILOT_FIELDS,
+    POWER_FLOW_SITE_FIELDS,
+    RECORD_TYPES,
+    SCHEMA,
+    STORAGE_CONTROLLER_FIELDS,
+    STORAGE_MODULE_FIELDS,
+    SYSTEM_RECORD_TYPES,
+    FieldMapping,
+    FieldSchema,
+    FroniusRecord,
+    InverterData,
+    MeterData,
+    PowerFlow,
+    StorageController,
+    StorageModule,
+    _compile_fields,
+    _table_schema,
+    _value,
+    as_dict,
+    as_records,
+    as_values,
+)
 
 _LOGGER = logging.getLogger(__name__)
-DEGREE_CELSIUS: Final = "°C"
-WATT: Final = "W"
-WATT_HOUR: Final = "Wh"
-AMPERE: Final = "A"
-VOLT: Final = "V"
-PERCENT: Final = "%"
-HERTZ: Final = "Hz"
-VOLTAMPEREREACTIVE: Final = "VAr"
-VOLTAMPEREREACTIVE_HOUR: Final = "VArh"
-VOLTAMPERE: Final = "VA"
 
 
 class API_VERSION(enum.Enum):
@@ -103,6 +170,42 @@ URL_LOGGER_INFO: Final = {
     API_VERSION.V1: "GetLoggerInfo.cgi",
 }
 
+# Endpoints by name, as used for fetch: (url spec, description)
+ENDPOINTS: Final[Dict[str, Tuple[Dict[API_VERSION, str], str]]] = {
+    "active_device_info": (URL_ACTIVE_DEVICE_INFO_SYSTEM, "current active device info"),
+    "inverter_info": (URL_INVERTER_INFO, "inverter info"),
+    "logger_info": (URL_LOGGER_INFO, "current logger info"),
+    "power_flow": (URL_POWER_FLOW, "current power flow"),
+    "system_meter": (URL_SYSTEM_METER, "current system meter"),
+    "system_inverter": (URL_SYSTEM_INVERTER, "current system inverter"),
+    "system_ohmpilot": (URL_SYSTEM_OHMPILOT, "current system ohmpilot"),
+    "system_storage": (URL_SYSTEM_STORAGE, "current system storage"),
+    "system_led": (URL_SYSTEM_LED, "current led"),
+    "device_meter": (URL_DEVICE_METER, "current meter"),
+    "device_storage": (URL_DEVICE_STORAGE, "current storage"),
+    "device_inverter": (URL_DEVICE_INVERTER_COMMON, "current inverter"),
+    "device_inverter_3p": (URL_DEVICE_INVERTER_3P, "current inverter 3p"),
+}
+
+# Device scope endpoints contained in system scope endpoints:
+# device endpoint: (system endpoint, collection of devices in converted data)
+SYSTEM_SCOPE_ENDPOINTS: Final = {
+    "device_meter": ("system_meter", "meters"),
+    "device_storage": ("system_storage", "storages"),
+}
+
+# Endpoints polled less frequently while the inverters sleep
+INVERTER_ENDPOINTS: Final = frozenset(
+    {"system_inverter", "device_inverter", "device_inverter_3p"}
+)
+
+# Suggested cache lifetimes in seconds for endpoints that rarely change
+DEFAULT_CACHE_TTL: Final = {
+    "active_device_info": 600,
+    "inverter_info": 600,
+    "logger_info": 3600,
+}
+
 HEADER_STATUS_CODES: Final = {
     0: "OKAY",
     1: "NotImplemented",
@@ -119,6 +222,28 @@ HEADER_STATUS_CODES: Final = {
     12: "DeviceNotAvailable",
     255: "UnknownError",
 }
+# Status codes signalling that a device or feature is missing: NotSupported and
+# DeviceNotAvailable
+UNSUPPORTED_STATUS_CODES: Final = frozenset({11, 12})
+# Status codes of transient failures worth retrying: Timeout, LNRequestError and
+# LNRequestTimeout
+TRANSIENT_STATUS_CODES: Final = frozenset({5, 7, 8})
+# context of stages without profile_hook
+_NO_SPAN: Final = nullcontext()
+
+# API version and base url answered per device url, shared by all instances
+_API_VERSION_CACHE: Dict[str, Tuple[API_VERSION, str]] = {}
+# pending API version discoveries per device url
+_API_VERSION_DISCOVERY: Dict[str, "asyncio.Future[Tuple[API_VERSION, str]]"] = {}
+
+
+def _api_version_discovered(
+    url: str, future: "asyncio.Future[Tuple[API_VERSION, str]]"
+) -> None:
+    if _API_VERSION_DISCOVERY.get(url) is future:
+        del _API_VERSION_DISCOVERY[url]
+    if not future.cancelled() and future.exception() is None:
+        _API_VERSION_CACHE[url] = future.result()
 
 
 class FroniusError(Exception):
@@ -141,6 +266,13 @@ class FroniusConnectionError(ConnectionError, FroniusError):
     """
 
 
+class CircuitOpenError(FroniusConnectionError):
+    """
+    An error to be raised if requests to the fronius device are failed fast
+    as previous connection attempts failed
+    """
+
+
 class InvalidAnswerError(ValueError, FroniusError):
     """
     An error to be raised if the host Fronius device could not answer a request
@@ -158,6 +290,9 @@ class BadStatusError(FroniusError):
         response: Dict[str, Any] = {},
     ) -> None:
         """Instantiate exception."""
+        self.endpoint = endpoint
+        self.code = code
+        self.reason = reason
         self.response = response
         message = (
             f"BadStatusError at {endpoint}. "
@@ -167,6 +302,351 @@ class BadStatusError(FroniusError):
         super().__init__(message)
 
 
+async def _completed(value: Any) -> Any:
+    return value
+
+
+def _remaining(deadline_at: Optional[float]) -> Optional[float]:
+    """Seconds left until the monotonic deadline, None without deadline"""
+    if deadline_at is None:
+        return None
+    return max(deadline_at - time.monotonic(), 0)
+
+
+def _endpoint_key(
+    name: Union[str, Tuple[str, str]], any_device: bool = False
+) -> Tuple[str, Optional[str]]:
+    """
+    Validate an endpoint name given as in ENDPOINTS or as (endpoint, device)
+    for device scope endpoints
+    :param any_device: Allow device scope endpoints without a device id,
+        naming the endpoint of all devices
+    :return: The endpoint and device id, None for system scope endpoints
+        and device scope endpoints without a device id
+    """
+    endpoint, device = (name, None) if isinstance(name, str) else name
+    if endpoint not in ENDPOINTS:
+        raise ValueError("Unknown endpoint {}".format(endpoint))
+    if any_device and device is None:
+        return endpoint, device
+    if (device is None) == endpoint.startswith("device_"):
+        raise ValueError(
+            "Device scope endpoints and only those need a device id, "
+            "got {}".format(name)
+        )
+    return endpoint, device
+
+
+class FetchResult(List[Dict[str, Any]]):
+    """
+    Responses of Fronius.fetch in the order of the requests
+    Attributes:
+        requested   Requests as (endpoint, device) that were started
+        skipped     Requests as (endpoint, device) that were not started as the
+                    endpoint was reported as not supported, see is_unsupported
+        missed  Requests as (endpoint, device) that were cancelled
+                as they did not complete before the deadline
+        failed  Requests as (endpoint, device) that failed, responses
+                with a bad status code are still contained in the responses
+    """
+
+    def __init__(self, responses: Iterable[Dict[str, Any]] = ()) -> None:
+        super().__init__(responses)
+        self.requested: List[Tuple[str, Optional[str]]] = []
+        self.skipped: List[Tuple[str, Optional[str]]] = []
+        self.missed: List[Tuple[str, Optional[str]]] = []
+        self.failed: List[Tuple[str, Optional[str]]] = []
+
+
+class CIRCUIT_STATE(enum.Enum):
+    value: str
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """
+    Fails requests to an unreachable Fronius device fast.
+    After failure_threshold consecutive connection failures the breaker opens,
+    aborting pending requests and failing new ones immediately.
+    After reset_timeout a single probe request is let through (half-open),
+    closing the breaker again on success.
+    Attributes:
+        failure_threshold  Consecutive connection failures to open the breaker,
+                    0 disables the breaker
+        reset_timeout   Seconds to wait before probing the device again
+        state       Current CIRCUIT_STATE
+        transitions     Number of transitions by (previous, new) state
+    """
+
+    def __init__(self, failure_threshold: int = 0, reset_timeout: float = 30) -> None:
+        """
+        Constructor
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CIRCUIT_STATE.CLOSED
+        self.transitions: Dict[Tuple[CIRCUIT_STATE, CIRCUIT_STATE], int] = {}
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        # resolved once the breaker opens to abort pending requests
+        self._tripped: Optional["asyncio.Future[None]"] = None
+
+    def _transition(self, state: CIRCUIT_STATE) -> None:
+        _LOGGER.debug("Circuit breaker %s -> %s", self.state, state)
+        key = (self.state, state)
+        self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.state = state
+        if state == CIRCUIT_STATE.OPEN:
+            self._opened_at = time.monotonic()
+            if self._tripped is not None and not self._tripped.done():
+                self._tripped.set_result(None)
+
+    def _allow_request(self, url: str) -> bool:
+        """
+        Check whether a request may be sent
+        :return: Whether the request is the probe of a half-open breaker
+        """
+        if self.state == CIRCUIT_STATE.OPEN:
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(
+                    "Connection to Fronius device failed recently, "
+                    "skipping request to {}.".format(url)
+                )
+            self._transition(CIRCUIT_STATE.HALF_OPEN)
+        if self.state == CIRCUIT_STATE.HALF_OPEN:
+            if self._probing:
+                raise CircuitOpenError(
+                    "Connection to Fronius device is being probed, "
+                    "skipping request to {}.".format(url)
+                )
+            self._probing = True
+            return True
+        return False
+
+    async def call(
+        self, request: Awaitable[Dict[str, Any]], url: str
+    ) -> Dict[str, Any]:
+        """
+        Run a request to the device, failing fast while the breaker is open
+        """
+        if self.failure_threshold <= 0:
+            return await request
+        try:
+            probe = self._allow_request(url)
+        except CircuitOpenError:
+            # close the coroutine that will never be awaited
+            if asyncio.iscoroutine(request):
+                request.close()
+            raise
+        loop = asyncio.get_running_loop()
+        if (
+            self._tripped is None
+            or self._tripped.done()
+            or self._tripped.get_loop() is not loop
+        ):
+            self._tripped = loop.create_future()
+        tripped = self._tripped
+        task = asyncio.ensure_future(request)
+        try:
+            await asyncio.wait({task, tripped}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            if probe:
+                self._probing = False
+        if not task.done():
+            task.cancel()
+            raise CircuitOpenError(
+                "Connection to Fronius device failed, "
+                "aborting request to {}.".format(url)
+            )
+        try:
+            result = task.result()
+        except FroniusConnectionError:
+            self._failures += 1
+            if self.state == CIRCUIT_STATE.HALF_OPEN or (
+                self.state == CIRCUIT_STATE.CLOSED
+                and self._failures >= self.failure_threshold
+            ):
+                self._transition(CIRCUIT_STATE.OPEN)
+            raise
+        self._failures = 0
+        if self.state != CIRCUIT_STATE.CLOSED:
+            self._transition(CIRCUIT_STATE.CLOSED)
+        return result
+
+
+class RequestLimiter:
+    """
+    Limits the requests to a single Fronius device
+    Attributes:
+        max_in_flight   Maximum number of concurrent requests, None for no limit
+        min_interval    Minimum seconds between the start of two requests
+        requests        Number of requests started
+        queued          Number of requests that had to wait
+        queue_time      Total seconds requests waited
+        max_queue_time  Longest seconds a single request waited
+    """
+
+    def __init__(
+        self, max_in_flight: Optional[int] = None, min_interval: float = 0
+    ) -> None:
+        """
+        Constructor
+        """
+        self.max_in_flight = max_in_flight
+        self.min_interval = min_interval
+        self.requests = 0
+        self.queued = 0
+        self.queue_time = 0.0
+        self.max_queue_time = 0.0
+        # created lazily to bind to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pacing_lock: Optional[asyncio.Lock] = None
+        self._last_start = float("-inf")
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Wait until a request may be started and hold its slot while in flight
+        """
+        self.requests += 1
+        if self.max_in_flight is None and self.min_interval <= 0:
+            yield
+            return
+
+        start = time.monotonic()
+        waited = False
+        if self.max_in_flight is not None and self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        if self._semaphore is not None:
+            waited = self._semaphore.locked()
+            await self._semaphore.acquire()
+        try:
+            if self.min_interval > 0:
+                if self._pacing_lock is None:
+                    self._pacing_lock = asyncio.Lock()
+                async with self._pacing_lock:
+                    delay = self._last_start + self.min_interval - time.monotonic()
+                    if delay > 0:
+                        waited = True
+                        await asyncio.sleep(delay)
+                    self._last_start = time.monotonic()
+            if waited:
+                queue_time = time.monotonic() - start
+                self.queued += 1
+                self.queue_time += queue_time
+                self.max_queue_time = max(self.max_queue_time, queue_time)
+            yield
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+
+class TracedPayload(NamedTuple):
+    """
+    Raw response of the device captured by a PayloadTracer
+    Attributes:
+        time        Wall clock time of the capture
+        endpoint    Name of the endpoint, see ENDPOINTS
+        url         Requested url
+        body        Undecoded body, cut to the max_size of the tracer
+        size        Size of the complete body in bytes
+    """
+
+    time: float
+    endpoint: str
+    url: str
+    body: bytes
+    size: int
+
+
+class PayloadTracer:
+    """
+    Captures a sample of the raw responses of a Fronius device for debugging
+    Attributes:
+        sample_rate     Fraction of responses captured per endpoint
+        sample_rates    Fraction of responses captured per endpoint name,
+                        overriding sample_rate
+        max_size        Maximum bytes kept of a single body
+        max_entries     Number of payloads kept, the oldest are dropped
+        directory       Write payloads to files in this directory instead of
+                        keeping them in entries, only the newest max_entries
+                        files written by the tracer are kept
+        entries         Captured payloads, oldest first
+        captured        Number of payloads captured
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 1.0,
+        sample_rates: Optional[Dict[str, float]] = None,
+        max_size: int = 64 * 1024,
+        max_entries: int = 100,
+        directory: Optional[str] = None,
+    ) -> None:
+        """
+        Constructor
+        """
+        self.sample_rate = sample_rate
+        self.sample_rates: Dict[str, float] = dict(sample_rates or {})
+        self.max_size = max_size
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries: Deque[TracedPayload] = deque(maxlen=max_entries)
+        self.captured = 0
+        self._files: Deque[str] = deque()
+
+    def capture(self, endpoint: str, url: str, body: bytes) -> None:
+        """
+        Keep the body of a response if it is sampled
+        """
+        rate = self.sample_rates.get(endpoint, self.sample_rate)
+        if rate < 1 and (rate <= 0 or random.random() >= rate):
+            return
+        self.captured += 1
+        payload = TracedPayload(
+            time.time(), endpoint, url, body[: self.max_size], len(body)
+        )
+        if self.directory is None:
+            self.entries.append(payload)
+            return
+        path = os.path.join(
+            self.directory,
+            "{:.0f}-{:06d}-{}.json".format(
+                payload.time * 1000, self.captured, payload.endpoint
+            ),
+        )
+        try:
+            with open(path, "wb") as file:
+                file.write(payload.body)
+        except OSError as err:
+            _LOGGER.debug("Writing payload of %s failed: %s", url, err)
+            return
+        self._files.append(path)
+        while len(self._files) > self.max_entries:
+            try:
+                os.remove(self._files.popleft())
+            except OSError:
+                pass
+
+
+_convert_meter = _compile_fields(METER_FIELDS)
+_convert_storage_controller = _compile_fields(STORAGE_CONTROLLER_FIELDS)
+_convert_storage_module = _compile_fields(STORAGE_MODULE_FIELDS)
+_convert_ohmpilot = _compile_fields(OHMPILOT_FIELDS)
+_convert_power_flow_site = _compile_fields(POWER_FLOW_SITE_FIELDS)
+_convert_logger_info = _compile_fields(LOGGER_INFO_FIELDS)
+
+# codec of Fronius instances without a json_codec
+DEFAULT_JSON_CODEC: Final = json_codec()
+
+
 class Fronius:
     """
     Interface to communicate with the Fronius Symo over http / JSON
@@ -176,6 +656,57 @@ class Fronius:
         url         The url for reaching of the Fronius device
                     (i.e. http://192.168.0.10:80)
         api_version  Version of Fronius API to use
+        cache_ttl   Seconds to cache converted responses per endpoint name
+                    (see ENDPOINTS and DEFAULT_CACHE_TTL), endpoints without
+                    a lifetime are not cached
+        cache_size  Maximum number of cached responses over all endpoints and
+                    devices, the least recently used responses are dropped
+        unsupported_backoff  Seconds to skip an endpoint of a device after it
+                    was reported as not supported, doubled on every repeated
+                    failure, 0 disables skipping. Inverter endpoints reporting
+                    DeviceNotAvailable, as sleeping inverters do, are skipped
+                    for this time without doubling.
+        unsupported_backoff_max  Maximum seconds to skip an unsupported endpoint
+                    before probing it again
+        plan_refresh_interval  Seconds after which the devices found for
+                    fetch(plan="auto") are looked up again
+        coalesce_window  Seconds to reuse a just completed response for all
+                    endpoints, concurrent identical requests are always
+                    served by a single request
+        max_in_flight  Maximum number of concurrent requests to the device
+        min_request_interval  Minimum seconds between the start of two requests
+                    to the device
+        breaker_threshold  Consecutive connection failures after which requests
+                    fail fast with CircuitOpenError, 0 disables the breaker
+        breaker_reset_timeout  Seconds after which a single request probes
+                    whether the device is reachable again
+        timeouts    Total timeout in seconds per endpoint name, overriding
+                    the timeout of the session
+        retries     Number of retries of transient failures, that is timeouts,
+                    connection errors and TRANSIENT_STATUS_CODES
+        retry_backoff   Seconds to wait at most before the first retry,
+                    doubled for every further retry
+        retry_backoff_max   Maximum seconds to wait before a retry
+        skip_unchanged  Return the previous converted data of an endpoint if
+                    the response did not change since, either judged by the
+                    raw "body" or by the "timestamp" of the response header.
+                    The body is then not decoded, an unchanged timestamp
+                    still requires decoding but skips the conversion.
+                    Repeated data is shared and must not be modified.
+                    Hits are counted in unchanged_hits.
+        output_format  "dict" to return converted data as nested dicts of
+                    values and units, "records" to return data of single
+                    devices with the default conversion as FroniusRecord,
+                    see as_records and as_dict, "values" to return maps of
+                    values by field without the units given by schema()
+        tracer      PayloadTracer capturing the raw responses of endpoints,
+                    None to capture nothing
+        profile_hook  Callable taking a stage of PROFILE_STAGES and the
+                    endpoint name and returning a context manager entered
+                    around the stage of every request, e.g. a StageProfile
+                    or a span of a tracing library, None to profile nothing
+        json_codec  JsonCodec decoding the responses and encoding data in
+                    dumps(), DEFAULT_JSON_CODEC if None
     """
 
     def __init__(
@@ -183,10 +714,33 @@ class Fronius:
         session: aiohttp.ClientSession,
         url: str,
         api_version: API_VERSION = API_VERSION.AUTO,
+        cache_ttl: Optional[Dict[str, float]] = None,
+        cache_size: int = 64,
+        unsupported_backoff: float = 0,
+        unsupported_backoff_max: float = 3600,
+        plan_refresh_interval: float = 3600,
+        coalesce_window: float = 0,
+        max_in_flight: Optional[int] = None,
+        min_request_interval: float = 0,
+        breaker_threshold: int = 0,
+        breaker_reset_timeout: float = 30,
+        timeouts: Optional[Dict[str, float]] = None,
+        retries: int = 0,
+        retry_backoff: float = 0.5,
+        retry_backoff_max: float = 10,
+        skip_unchanged: Optional[str] = None,
+        output_format: str = "dict",
+        tracer: Optional[PayloadTracer] = None,
+        profile_hook: Optional[Callable[[str, str], ContextManager[Any]]] = None,
+        json_codec: Optional[JsonCodec] = None,
     ) -> None:
         """
         Constructor
         """
+        if skip_unchanged not in (None, "body", "timestamp"):
+            raise ValueError("Unknown skip_unchanged {}".format(skip_unchanged))
+        if output_format not in ("dict", "records", "values"):
+            raise ValueError("Unknown output_format {}".format(output_format))
         self._aio_session = session
         while url[-1] == "/":
             url = url[:-1]
@@ -196,15 +750,134 @@ class Fronius:
             self.url = "http://{}".format(self.url)
         self.api_version = api_version
         self.base_url = API_BASEPATHS.get(api_version)
+        if self.base_url is None and self.url in _API_VERSION_CACHE:
+            self.api_version, self.base_url = _API_VERSION_CACHE[self.url]
+        self.cache_ttl: Dict[str, float] = dict(cache_ttl or {})
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self.coalesce_window = coalesce_window
+        self.limiter = RequestLimiter(max_in_flight, min_request_interval)
+        self.circuit_breaker = CircuitBreaker(breaker_threshold, breaker_reset_timeout)
+        self.timeouts: Dict[str, float] = dict(timeouts or {})
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.skip_unchanged = skip_unchanged
+        self.unchanged_hits = 0
+        self.output_format = output_format
+        self.tracer = tracer
+        self.profile_hook = profile_hook
+        self.json_codec = json_codec or DEFAULT_JSON_CODEC
+        # metrics by endpoint name, see stats()
+        self._stats: Dict[str, EndpointStats] = {}
+        # (endpoint, devices) -> (conversion, fingerprint, converted data)
+        self._fingerprints: Dict[
+            Tuple[str, Tuple[str, ...]], Tuple[Callable[..., Any], Any, Dict[str, Any]]
+        ] = {}
+        # pending requests by (endpoint, devices, conversion)
+        self._pending: Dict[Tuple[Any, ...], "asyncio.Future[Dict[str, Any]]"] = {}
+        # number of callers waiting for a pending request
+        self._waiters: Dict["asyncio.Future[Dict[str, Any]]", int] = {}
+        self.unsupported_backoff = unsupported_backoff
+        self.unsupported_backoff_max = unsupported_backoff_max
+        # (endpoint, device) -> (number of failures, monotonic time of next probe)
+        self._unsupported: Dict[Tuple[str, Tuple[str, ...]], Tuple[int, float]] = {}
+        self.plan_refresh_interval = plan_refresh_interval
+        # devices found by fetch(plan="auto") and monotonic time of expiry,
+        # no devices if the active device info is not supported
+        self._auto_plan: Optional[Tuple[Optional[Dict[str, List[str]]], float]] = None
 
-    async def _fetch_json(self, url: str) -> Dict[str, Any]:
+    @staticmethod
+    def clear_api_version_cache(url: Optional[str] = None) -> None:
+        """
+        Forget the discovered API versions of all devices or of the given url
+        """
+        if url is None:
+            _API_VERSION_CACHE.clear()
+        else:
+            _API_VERSION_CACHE.pop(url, None)
+
+    async def _fetch_json(
+        self, url: str, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
         Fetch json value from fixed url
+        :param timeout: Total timeout in seconds overriding the session timeout
         """
-        result: Dict[str, Any]
+        return self._decode_json(
+            await self._fetch_raw(url, timeout), url, self.json_codec
+        )
+
+    async def _fetch_raw(
+        self,
+        url: str,
+        timeout: Optional[float] = None,
+        stats: Optional[EndpointStats] = None,
+    ) -> bytes:
+        """
+        Fetch the undecoded body from fixed url
+        :param timeout: Total timeout in seconds overriding the session timeout
+        :param stats: Metrics of the endpoint to count the request in
+        """
+        if stats is None:
+            async with self.limiter.slot():
+                return await self.circuit_breaker.call(
+                    self._get_raw(url, timeout), url
+                )
+        stats.requests += 1
+        queued = time.monotonic()
+        async with self.limiter.slot():
+            started = time.monotonic()
+            raw = await self.circuit_breaker.call(self._get_raw(url, timeout), url)
+        stats.latency["queue"].observe(started - queued)
+        stats.latency["network"].observe(time.monotonic() - started)
+        stats.bytes_received += len(raw)
+        return raw
+
+    def _span(self, stage: str, endpoint: str) -> ContextManager[Any]:
+        if self.profile_hook is None:
+            return _NO_SPAN
+        return self.profile_hook(stage, endpoint)
+
+    def _endpoint_stats(self, endpoint: str) -> EndpointStats:
+        stats = self._stats.get(endpoint)
+        if stats is None:
+            stats = self._stats[endpoint] = EndpointStats()
+        return stats
+
+    def stats(self) -> Dict[str, EndpointStats]:
+        """
+        Metrics of the requests by endpoint name, counted since construction.
+        The returned EndpointStats keep counting.
+        """
+        return dict(self._stats)
+
+    def prometheus_metrics(self) -> str:
+        """
+        The stats of the device in the Prometheus text exposition format,
+        labelled by host and endpoint
+        """
+        return prometheus_text({self.url: self._stats})
+
+    def dumps(self, data: Any, indent: bool = False) -> bytes:
+        """
+        Encode converted data, e.g. the result of fetch(), as JSON
+        with the json_codec
+        :param indent: Indent the JSON for readability
+        """
+        if indent and self.json_codec.dumps_indented is not None:
+            return self.json_codec.dumps_indented(data)
+        return self.json_codec.dumps(data)
+
+    async def _get_raw(self, url: str, timeout: Optional[float]) -> bytes:
+        kwargs = {}
+        if timeout is not None:
+            kwargs["timeout"] = aiohttp.ClientTimeout(total=timeout)
         try:
-            async with self._aio_session.get(url) as res:
-                result = await res.json(content_type=None)
+            async with self._aio_session.get(url, **kwargs) as res:
+                return self._utf8(await res.read(), res.charset)
         except asyncio.TimeoutError:
             raise FroniusConnectionError(
                 "Connection to Fronius device timed out at {}.".format(url)
@@ -213,7 +886,33 @@ class Fronius:
             raise FroniusConnectionError(
                 "Connection to Fronius device failed at {}.".format(url)
             )
-        except (aiohttp.ContentTypeError, json.decoder.JSONDecodeError):
+
+    @staticmethod
+    def _utf8(raw: bytes, charset: Optional[str]) -> bytes:
+        """
+        Re-encode a body in another charset declared by the device to UTF-8,
+        the only encoding the JSON codecs decode
+        """
+        if charset is None:
+            return raw
+        try:
+            if codecs.lookup(charset).name == "utf-8":
+                return raw
+            return raw.decode(charset).encode("utf-8")
+        except (LookupError, UnicodeDecodeError):
+            # left to the codec to reject
+            return raw
+
+    @staticmethod
+    def _decode_json(raw: bytes, url: str, codec: JsonCodec) -> Dict[str, Any]:
+        result: Dict[str, Any]
+        # an empty body is returned as None like aiohttp does
+        if not raw.strip():
+            return None  # type: ignore[return-value]
+        try:
+            result = codec.loads(raw)
+        except ValueError:
+            # JSONDecodeError or UnicodeDecodeError
             raise InvalidAnswerError(
                 "Host returned a non-JSON reply at {}.".format(url)
             )
@@ -225,39 +924,71 @@ class Fronius:
         :return:
         """
         try:
-            res = await self._fetch_json("{}/{}".format(self.url, URL_API_VERSION))
-            api_version, base_url = API_VERSION(res["APIVersion"]), res["BaseURL"]
+            return await self._fetch_api_version()
         except InvalidAnswerError:
             # Host returns 404 response if API version is 0
-            api_version, base_url = API_VERSION.V0, API_BASEPATHS[API_VERSION.V0]
+            return API_VERSION.V0, API_BASEPATHS[API_VERSION.V0]
 
-        return api_version, base_url
+    async def _fetch_api_version(self) -> Tuple[API_VERSION, str]:
+        """
+        Fetches the API version answered by the device,
+        raising InvalidAnswerError if the device does not answer it
+        """
+        res = await self._fetch_json("{}/{}".format(self.url, URL_API_VERSION))
+        return API_VERSION(res["APIVersion"]), res["BaseURL"]
 
-    async def _fetch_solar_api(
-        self, spec: Dict[API_VERSION, str], spec_name: str, *spec_formattings: str
-    ) -> Dict[str, Any]:
+    async def _discover_api_version(self) -> Tuple[API_VERSION, str]:
         """
-        Fetch page of solar_api
+        Discover the API version of the device once per url,
+        concurrent callers share the pending request.
+        Only versions answered by the device are remembered for the url,
+        the fallback to V0 is not as a device still booting may answer
+        with an error page as well.
+        """
+        cached = _API_VERSION_CACHE.get(self.url)
+        if cached is not None:
+            return cached
+        future = _API_VERSION_DISCOVERY.get(self.url)
+        if future is None or future.get_loop() is not asyncio.get_running_loop():
+            future = asyncio.ensure_future(self._fetch_api_version())
+            _API_VERSION_DISCOVERY[self.url] = future
+            future.add_done_callback(
+                functools.partial(_api_version_discovered, self.url)
+            )
+        try:
+            # a cancelled caller must not cancel the discovery of the others
+            return await asyncio.shield(future)
+        except InvalidAnswerError:
+            # Host returns 404 response if API version is 0
+            return API_VERSION.V0, API_BASEPATHS[API_VERSION.V0]
+
+    async def _solar_api_url(
+        self,
+        spec: Dict[API_VERSION, str],
+        spec_name: str,
+        *spec_formattings: str,
+    ) -> str:
+        """
+        Build the url of a page of solar_api, discovering the API version if needed
         """
         # either unknown api version given or automatic
         if self.base_url is None:
             prev_api_version = self.api_version
-            self.api_version, self.base_url = await self.fetch_api_version()
+            self.api_version, self.base_url = await self._discover_api_version()
             if prev_api_version == API_VERSION.AUTO:
                 _LOGGER.debug(
-                    """using highest supported API version {}""".format(
-                        self.api_version
-                    )
+                    "using highest supported API version %s", self.api_version
                 )
             if (
                 prev_api_version != self.api_version
                 and prev_api_version != API_VERSION.AUTO
             ):
                 _LOGGER.warning(
-                    (
-                        """Unknown API version {} is not supported by host {},"""
-                        """using highest supported API version {} instead"""
-                    ).format(prev_api_version, self.url, self.api_version)
+                    """Unknown API version %s is not supported by host %s,"""
+                    """using highest supported API version %s instead""",
+                    prev_api_version,
+                    self.url,
+                    self.api_version,
                 )
         spec_url = spec.get(self.api_version)
         if spec_url is None:
@@ -269,9 +1000,8 @@ class Fronius:
         if spec_formattings:
             spec_url = spec_url.format(*spec_formattings)
 
-        _LOGGER.debug("Get {} data for {}".format(spec_name, spec_url))
-        res = await self._fetch_json("{}{}{}".format(self.url, self.base_url, spec_url))
-        return res
+        _LOGGER.debug("Get %s data for %s", spec_name, spec_url)
+        return "{}{}{}".format(self.url, self.base_url, spec_url)
 
     async def fetch(
         self,
@@ -287,43 +1017,451 @@ class Fronius:
         # storage is not necessarily supported by every fronius device
         device_storage: Iterable[str] = frozenset(["0"]),
         device_inverter: Iterable[str] = frozenset(["1"]),
-    ) -> List[Dict[str, Any]]:
-        requests = []
+        plan: Optional[str] = None,
+        derive_device_scope: bool = True,
+        deadline: Optional[float] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> "FetchResult":
+        """
+        Fetch data of several endpoints concurrently
+        :param plan: "auto" to request exactly the devices reported by the active
+            device info instead of the given device ids, system endpoints
+            of device classes that are not present are skipped.
+            The active devices are looked up again after plan_refresh_interval.
+        :param derive_device_scope: Take device scope meter and storage data
+            from the system scope response if both are fetched
+            instead of requesting the devices again
+        :param deadline: Seconds after which requests still pending are cancelled,
+            the responses completed until then are returned
+        :param fields: Names of the fields to convert for all endpoints, all fields
+            by default. Only the requested fields are evaluated, collections of
+            devices keep all devices with the requested fields.
+            The header fields timestamp and status are always returned.
+            Names that are no field of any endpoint raise ValueError.
+        :return: The responses in order of the requests, listing the requests
+            that were skipped, missed the deadline or failed
+        """
+        deadline_at = None if deadline is None else time.monotonic() + deadline
+        requests, skipped = await self._start_requests(
+            deadline_at,
+            active_device_info=active_device_info,
+            inverter_info=inverter_info,
+            logger_info=logger_info,
+            power_flow=power_flow,
+            system_meter=system_meter,
+            system_inverter=system_inverter,
+            system_ohmpilot=system_ohmpilot,
+            system_storage=system_storage,
+            device_meter=device_meter,
+            device_storage=device_storage,
+            device_inverter=device_inverter,
+            plan=plan,
+            derive_device_scope=derive_device_scope,
+            fields=fields,
+        )
+        done: Set["asyncio.Future[Dict[str, Any]]"] = set()
+        try:
+            if requests:
+                done, _ = await asyncio.wait(
+                    [request for _, _, request in requests],
+                    timeout=_remaining(deadline_at),
+                )
+        finally:
+            await Fronius._cancel([request for _, _, request in requests])
+
+        responses = FetchResult()
+        responses.skipped.extend(skipped)
+        for endpoint, device, request in requests:
+            responses.requested.append((endpoint, device))
+            if request not in done:
+                responses.missed.append((endpoint, device))
+                continue
+            result = request.exception()
+            if result is not None:
+                _LOGGER.warning(result)
+                responses.failed.append((endpoint, device))
+                if isinstance(result, BadStatusError):
+                    responses.append(result.response)
+                continue
+            responses.append(request.result())
+        if responses.missed:
+            _LOGGER.warning("Requests missed the deadline: %s", responses.missed)
+        return responses
+
+    @staticmethod
+    async def _cancel(requests: List["asyncio.Future[Any]"]) -> None:
+        """
+        Cancel the pending requests and wait until they stopped,
+        so the shared requests they wait for are cancelled as well
+        """
+        pending = [request for request in requests if not request.done()]
+        for request in pending:
+            request.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+    async def fetch_iter(
+        self, deadline: Optional[float] = None, **kwargs: Any
+    ) -> AsyncIterator[
+        Tuple[Tuple[str, Optional[str]], Union[Dict[str, Any], BaseException]]
+    ]:
+        """
+        Fetch data of several endpoints concurrently like fetch,
+        yielding ((endpoint, device), response) as soon as each request completes.
+        Failed requests yield their exception instead of a response.
+        Keyword arguments select the requests as for fetch.
+        :param deadline: Seconds after which requests still pending are cancelled
+            and the iteration ends
+        """
+        deadline_at = None if deadline is None else time.monotonic() + deadline
+        requests, _ = await self._start_requests(deadline_at, **kwargs)
+        order = {request: i for i, (_, _, request) in enumerate(requests)}
+        pending = set(order)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=_remaining(deadline_at),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    _LOGGER.warning(
+                        "Requests missed the deadline: %s",
+                        [requests[order[request]][:2] for request in pending],
+                    )
+                    break
+                for request in sorted(done, key=order.__getitem__):
+                    endpoint, device, _ = requests[order[request]]
+                    result = request.exception()
+                    if result is None:
+                        yield (endpoint, device), request.result()
+                    else:
+                        yield (endpoint, device), result
+        finally:
+            await Fronius._cancel(list(order))
+
+    async def poll(
+        self,
+        schedule: Dict[Union[str, Tuple[str, str]], float],
+        idle_factor: float = 1,
+    ) -> AsyncIterator[
+        Dict[Tuple[str, Optional[str]], Union[Dict[str, Any], BaseException]]
+    ]:
+        """
+        Poll endpoints continuously, each at its own interval.
+        Ticks are scheduled relative to the start on the monotonic clock so they
+        do not drift, ticks that are overdue as a poll or the consumer took too
+        long are skipped instead of queued.
+        :param schedule: Seconds between polls by endpoint name, device scope
+            endpoints are given as (endpoint, device),
+            i.e. {"power_flow": 1, ("device_meter", "0"): 5, "inverter_info": 3600}
+        :param idle_factor: Factor to stretch the intervals of INVERTER_ENDPOINTS
+            by while the inverters report to be sleeping or in standby.
+            They are polled at their interval again as soon as an inverter or the
+            power flow reports production.
+        :return: Yields a snapshot per tick mapping (endpoint, device) of the
+            endpoints due to the response, or the exception if the request failed.
+            A tick waits for its requests only until the next tick is due,
+            requests taking longer are yielded with a later tick and their
+            endpoint is not requested again until they completed.
+        """
+        intervals: Dict[Tuple[str, Optional[str]], float] = {}
+        for name, interval in schedule.items():
+            key = _endpoint_key(name)
+            if interval <= 0:
+                raise ValueError("Interval of {} must be positive".format(name))
+            intervals[key] = interval
+
+        idle = False
+
+        def current_interval(name: Tuple[str, Optional[str]]) -> float:
+            if idle and name[0] in INVERTER_ENDPOINTS:
+                return intervals[name] * idle_factor
+            return intervals[name]
+
+        start = time.monotonic()
+        # ticks of an endpoint are multiples of its interval from its anchor
+        anchor = {name: start for name in intervals}
+        due = dict(anchor)
+        # requests by start order that did not complete yet
+        running: Dict[
+            "asyncio.Future[Dict[str, Any]]", Tuple[str, Optional[str]]
+        ] = {}
+        try:
+            while intervals:
+                now = time.monotonic()
+                started = []
+                for name in [name for name, at in due.items() if at <= now]:
+                    # next tick after now, skipping missed ticks
+                    interval = current_interval(name)
+                    ticks = math.floor((now - anchor[name]) / interval) + 1
+                    due[name] = anchor[name] + interval * ticks
+                    if name in running.values():
+                        _LOGGER.debug(
+                            "Skipping poll of %s, previous request still running",
+                            name,
+                        )
+                        continue
+                    request = asyncio.ensure_future(self._endpoint_data(*name))
+                    running[request] = name
+                    started.append(request)
+                timeout = max(min(due.values()) - time.monotonic(), 0)
+                # requests still running at the next tick are reported later
+                if started:
+                    await asyncio.wait(started, timeout=timeout)
+                elif running:
+                    await asyncio.wait(
+                        running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                else:
+                    await asyncio.sleep(timeout)
+                snapshot: Dict[
+                    Tuple[str, Optional[str]], Union[Dict[str, Any], BaseException]
+                ] = {}
+                for request in [request for request in running if request.done()]:
+                    name = running.pop(request)
+                    error = request.exception()
+                    snapshot[name] = request.result() if error is None else error
+                if not snapshot:
+                    continue
+                if (
+                    idle_factor != 1
+                    and Fronius._inverters_idle(snapshot, idle) != idle
+                ):
+                    idle = not idle
+                    _LOGGER.debug(
+                        "Inverters %s, polling inverter endpoints %s",
+                        "idle" if idle else "producing",
+                        "{} times less often".format(idle_factor)
+                        if idle
+                        else "at their interval",
+                    )
+                    if not idle:
+                        # probe inverters skipped during the night right away
+                        for key in list(self._unsupported):
+                            if key[0] in INVERTER_ENDPOINTS:
+                                del self._unsupported[key]
+                    now = time.monotonic()
+                    for name in intervals:
+                        if name[0] in INVERTER_ENDPOINTS:
+                            anchor[name] = now
+                            due[name] = now + current_interval(name) if idle else now
+                yield snapshot
+        finally:
+            await Fronius._cancel(list(running))
+
+    @staticmethod
+    def _inverters_idle(
+        snapshot: Dict[Tuple[str, Optional[str]], Union[Dict[str, Any], BaseException]],
+        idle: bool,
+    ) -> bool:
+        """
+        Whether the inverters are idle judging by a poll snapshot,
+        keeping the previous state if the snapshot does not tell
+        """
+        sleeping = False
+        for (endpoint, _), result in snapshot.items():
+            if isinstance(result, FroniusRecord):
+                result = result.to_dict()
+            if endpoint == "power_flow" and isinstance(result, dict):
+                if _value(result.get("power_photovoltaics")):
+                    return False
+            elif endpoint in INVERTER_ENDPOINTS:
+                if isinstance(result, BadStatusError):
+                    # DeviceNotAvailable is returned by sleeping inverters
+                    sleeping = sleeping or result.code == 12
+                    continue
+                if not isinstance(result, dict):
+                    continue
+                inverter_idle = None
+                if "status_code" in result:
+                    inverter_idle = (
+                        _value(result["status_code"]) in INVERTER_IDLE_STATUS_CODES
+                    )
+                if "inverter_state" in result:
+                    inverter_idle = (
+                        _value(result["inverter_state"]) in INVERTER_IDLE_STATES
+                    )
+                if inverter_idle is False:
+                    return False
+                sleeping = sleeping or bool(inverter_idle)
+        return sleeping or idle
+
+    async def _start_requests(
+        self,
+        deadline_at: Optional[float],
+        active_device_info: bool = True,
+        inverter_info: bool = True,
+        logger_info: bool = True,
+        power_flow: bool = True,
+        system_meter: bool = True,
+        system_inverter: bool = True,
+        system_ohmpilot: bool = True,
+        system_storage: bool = True,
+        device_meter: Iterable[str] = frozenset(["0"]),
+        device_storage: Iterable[str] = frozenset(["0"]),
+        device_inverter: Iterable[str] = frozenset(["1"]),
+        plan: Optional[str] = None,
+        derive_device_scope: bool = True,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Tuple[
+        List[Tuple[str, Optional[str], "asyncio.Future[Dict[str, Any]]"]],
+        List[Tuple[str, Optional[str]]],
+    ]:
+        """
+        Plan the requests of fetch and start them
+        :return: The started requests with their endpoint and device and the
+            (endpoint, device) skipped as they are not supported
+        """
+        names = None
+        if fields is not None:
+            # fields apply to all endpoints, each converts those it knows
+            names = _requested_fields(fields)
+            unknown = frozenset.intersection(
+                *(_unknown_fields(endpoint, names) for endpoint in ENDPOINTS)
+            )
+            if unknown:
+                raise ValueError(
+                    "Unknown fields {}".format(", ".join(sorted(unknown)))
+                )
+        fresh_device_info = None
+        if plan == "auto":
+            try:
+                devices, fresh_device_info = await asyncio.wait_for(
+                    self._auto_devices(), _remaining(deadline_at)
+                )
+            except (FroniusError, asyncio.TimeoutError) as err:
+                _LOGGER.warning(
+                    "Planning by active devices failed, using given devices: %r", err
+                )
+                devices = None
+            if devices is not None:
+                system_meter = system_meter and bool(devices["meters"])
+                system_inverter = system_inverter and bool(devices["inverters"])
+                system_ohmpilot = system_ohmpilot and bool(devices["ohmpilots"])
+                system_storage = system_storage and bool(devices["storages"])
+                device_meter = devices["meters"]
+                device_storage = devices["storages"]
+                device_inverter = devices["inverters"]
+        elif plan is not None:
+            raise ValueError("Unknown fetch plan {}".format(plan))
+
+        plan_requests: List[Tuple[str, Optional[str]]] = []
         if active_device_info:
-            requests.append(self.current_active_device_info())
+            plan_requests.append(("active_device_info", None))
         if inverter_info:
-            requests.append(self.inverter_info())
+            plan_requests.append(("inverter_info", None))
         if logger_info:
-            requests.append(self.current_logger_info())
+            plan_requests.append(("logger_info", None))
         if power_flow:
-            requests.append(self.current_power_flow())
+            plan_requests.append(("power_flow", None))
         if system_meter:
-            requests.append(self.current_system_meter_data())
+            plan_requests.append(("system_meter", None))
         if system_inverter:
-            requests.append(self.current_system_inverter_data())
+            plan_requests.append(("system_inverter", None))
         if system_ohmpilot:
-            requests.append(self.current_system_ohmpilot_data())
+            plan_requests.append(("system_ohmpilot", None))
         if system_storage:
-            requests.append(self.current_system_storage_data())
+            plan_requests.append(("system_storage", None))
         for i in device_meter:
-            requests.append(self.current_meter_data(i))
+            plan_requests.append(("device_meter", i))
         for i in device_storage:
-            requests.append(self.current_storage_data(i))
+            plan_requests.append(("device_storage", i))
         for i in device_inverter:
-            requests.append(self.current_inverter_data(i))
+            plan_requests.append(("device_inverter", i))
         for i in device_inverter:
-            requests.append(self.current_inverter_3p_data(i))
+            plan_requests.append(("device_inverter_3p", i))
 
-        res = await asyncio.gather(*requests, return_exceptions=True)
-        responses = []
-        for result in res:
-            if isinstance(result, (FroniusError, BaseException)):
-                _LOGGER.warning(result)
-                if isinstance(result, BadStatusError):
-                    responses.append(result.response)
+        requests: List[Tuple[str, Optional[str], "asyncio.Future[Dict[str, Any]]"]] = []
+        skipped: List[Tuple[str, Optional[str]]] = []
+        system_scope: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        for endpoint, device in plan_requests:
+            if self.is_unsupported(endpoint, device):
+                _LOGGER.debug(
+                    "Skipping unsupported %s of device %s", endpoint, device
+                )
+                skipped.append((endpoint, device))
                 continue
-            responses.append(result)
-        return responses
+            endpoint_fields = None
+            if names is not None:
+                endpoint_fields = names - _unknown_fields(endpoint, names)
+            request: Awaitable[Dict[str, Any]]
+            if endpoint == "active_device_info" and fresh_device_info is not None:
+                request = _completed(fresh_device_info)
+            elif (
+                derive_device_scope
+                and endpoint in SYSTEM_SCOPE_ENDPOINTS
+                and SYSTEM_SCOPE_ENDPOINTS[endpoint][0] in system_scope
+            ):
+                request = self._derived_device_data(
+                    system_scope[SYSTEM_SCOPE_ENDPOINTS[endpoint][0]],
+                    endpoint,
+                    device,
+                    endpoint_fields,
+                )
+            else:
+                request = self._endpoint_data(endpoint, device, endpoint_fields)
+            future = asyncio.ensure_future(request)
+            if device is None:
+                system_scope[endpoint] = future
+            requests.append((endpoint, device, future))
+        return requests, skipped
+
+    async def _derived_device_data(
+        self,
+        system_request: "asyncio.Future[Dict[str, Any]]",
+        endpoint: str,
+        device: Optional[str],
+        fields: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Take the data of a device from the response of the system scope request,
+        requesting the device itself only if it is missing there
+        """
+        collection = SYSTEM_SCOPE_ENDPOINTS[endpoint][1]
+        try:
+            system_data = await system_request
+        except FroniusError:
+            return await self._endpoint_data(endpoint, device, fields)
+        device_data = system_data[collection].get(str(device))
+        if device_data is None:
+            return await self._endpoint_data(endpoint, device, fields)
+        if isinstance(device_data, FroniusRecord):
+            return device_data.replace(
+                timestamp=system_data["timestamp"]["value"],
+                status=system_data["status"],
+            )
+        sensor = {
+            "timestamp": system_data["timestamp"],
+            "status": system_data["status"],
+        }
+        sensor.update(device_data)
+        return sensor
+
+    async def _auto_devices(
+        self,
+    ) -> Tuple[Optional[Dict[str, List[str]]], Optional[Dict[str, Any]]]:
+        """
+        Get the ids of the active devices per device class,
+        looked up again once plan_refresh_interval passed
+        :return: The device ids, None if the active device info is not supported,
+            and the active device info if it was requested for this lookup
+        """
+        if self._auto_plan is not None and self._auto_plan[1] > time.monotonic():
+            return self._auto_plan[0], None
+        try:
+            info = await self.current_active_device_info()
+        except NotSupportedError as err:
+            _LOGGER.debug("Planning by active devices not possible: %s", err)
+            self._auto_plan = (None, time.monotonic() + self.plan_refresh_interval)
+            return None, None
+        devices = {
+            device_class: [device["device_id"] for device in info.get(device_class, [])]
+            for device_class in ("inverters", "meters", "ohmpilots", "storages")
+        }
+        _LOGGER.debug("Planned fetch for active devices %s", devices)
+        self._auto_plan = (devices, time.monotonic() + self.plan_refresh_interval)
+        return devices, info
 
     @staticmethod
     def _status_data(res: Dict[str, Any]) -> Dict[str, Any]:
@@ -345,39 +1483,320 @@ class Fronius:
     @staticmethod
     def error_reason(sensor_data: Dict[str, Any]) -> Any:
         """
-        Extract error reason from returned sensor data
-        :param sensor_data: Dictionary returned as current data
+        Extract error reason from returned sensor data
+        :param sensor_data: Dictionary returned as current data
+        """
+        return sensor_data["status"]["Reason"]
+
+    @staticmethod
+    def schema() -> Dict[str, Dict[str, FieldSchema]]:
+        """
+        Describe the fields of the converted data of each endpoint
+        :return: The unit and type of each field by field name by endpoint name,
+            a copy that may be modified without affecting the conversions
+        """
+        return copy.deepcopy(SCHEMA)
+
+    def invalidate_cache(
+        self, endpoint: Optional[str] = None, device: Optional[str] = None
+    ) -> None:
+        """
+        Drop cached responses, optionally only of one endpoint and device
+        :param endpoint: Name of the endpoint as in ENDPOINTS
+        :param device: Device id of device scope endpoints
+        """
+        for key in list(self._cache):
+            if endpoint is not None and key[0] != endpoint:
+                continue
+            if device is not None and key[1] != (str(device),):
+                continue
+            del self._cache[key]
+
+    def is_unsupported(self, endpoint: str, device: Optional[str] = None) -> bool:
+        """
+        Whether the endpoint of a device is currently skipped
+        as it was reported to be not supported
+        :param endpoint: Name of the endpoint as in ENDPOINTS
+        :param device: Device id of device scope endpoints
+        """
+        key = (endpoint, () if device is None else (str(device),))
+        failure = self._unsupported.get(key)
+        return failure is not None and failure[1] > time.monotonic()
+
+    def _mark_unsupported(
+        self, key: Tuple[str, Tuple[str, ...]], escalate: bool = True
+    ) -> None:
+        failures = self._unsupported.get(key, (0, 0.0))[0] + 1 if escalate else 1
+        backoff = min(
+            self.unsupported_backoff * 2 ** (failures - 1),
+            self.unsupported_backoff_max,
+        )
+        self._unsupported[key] = (failures, time.monotonic() + backoff)
+
+    def _endpoint_data(
+        self,
+        endpoint: str,
+        device: Optional[str] = None,
+        fields: Optional[Iterable[str]] = None,
+    ) -> Awaitable[Dict[str, Any]]:
+        """
+        Get converted data of an endpoint by name with the default conversion,
+        optionally converting only the given fields
+        """
+        fun = Fronius._conversion(endpoint, None, fields)
+        if device is None:
+            return self._current_data(fun, endpoint)
+        return self._current_data(fun, endpoint, device)
+
+    @staticmethod
+    def _conversion(
+        endpoint: str,
+        ext_cb_conversion: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]],
+        fields: Optional[Iterable[str]],
+    ) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+        """
+        The conversion of an endpoint, fields are not projected
+        for external conversions
+        """
+        if ext_cb_conversion is not None:
+            return ext_cb_conversion
+        if fields is not None:
+            names = _requested_fields(fields)
+            unknown = _unknown_fields(endpoint, names)
+            if unknown:
+                raise ValueError(
+                    "Unknown fields {} of endpoint {}".format(
+                        ", ".join(sorted(unknown)), endpoint
+                    )
+                )
+            return _projection(endpoint, names)
+        return _ENDPOINT_CONVERTERS[endpoint]
+
+    async def _current_data(
+        self,
+        fun: Callable[[Dict[str, Any]], Dict[str, Any]],
+        endpoint: str,
+        *spec_formattings: str,
+    ) -> Dict[str, Any]:
+        """
+        Get converted data of an endpoint, served from the cache
+        if a lifetime is configured for the endpoint.
+        Cached responses are shared and must not be modified.
+        Endpoints reported as not supported are skipped for a back-off period
+        if unsupported_backoff is set.
+        """
+        devices = tuple(str(f) for f in spec_formattings)
+        if self.unsupported_backoff > 0:
+            if self.is_unsupported(endpoint, *devices):
+                raise NotSupportedError(
+                    "Device type {} {}not supported by the fronius device, "
+                    "skipped until next probe".format(
+                        ENDPOINTS[endpoint][1], "".join(d + " " for d in devices)
+                    )
+                )
+            try:
+                sensor = await self._cached_data(fun, endpoint, *spec_formattings)
+            except NotSupportedError:
+                self._mark_unsupported((endpoint, devices))
+                raise
+            except BadStatusError as err:
+                if err.code in UNSUPPORTED_STATUS_CODES:
+                    # sleeping inverters report DeviceNotAvailable every night,
+                    # they are probed again after the base back-off
+                    self._mark_unsupported(
+                        (endpoint, devices),
+                        escalate=err.code != 12 or endpoint not in INVERTER_ENDPOINTS,
+                    )
+                raise
+            self._unsupported.pop((endpoint, devices), None)
+            return sensor
+        return await self._cached_data(fun, endpoint, *spec_formattings)
+
+    async def _cached_data(
+        self,
+        fun: Callable[[Dict[str, Any]], Dict[str, Any]],
+        endpoint: str,
+        *spec_formattings: str,
+    ) -> Dict[str, Any]:
+        """
+        Serve data from the cache or join a pending identical request
+        """
+        key = (endpoint, tuple(str(f) for f in spec_formattings), fun)
+        ttl = max(self.cache_ttl.get(endpoint, 0), self.coalesce_window)
+        if ttl > 0:
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self._endpoint_stats(endpoint).cache_hits += 1
+                return cached[1]
+
+        request = self._pending.get(key)
+        if request is None or request.get_loop() is not asyncio.get_running_loop():
+            request = asyncio.ensure_future(
+                self._request_data(fun, endpoint, *spec_formattings)
+            )
+            self._pending[key] = request
+            request.add_done_callback(functools.partial(self._request_done, key, ttl))
+        else:
+            self._endpoint_stats(endpoint).cache_hits += 1
+        self._waiters[request] = self._waiters.get(request, 0) + 1
+        try:
+            # a cancelled caller must not cancel the request of the others
+            return await asyncio.shield(request)
+        finally:
+            waiters = self._waiters.pop(request) - 1
+            if waiters:
+                self._waiters[request] = waiters
+            elif not request.done():
+                # the last caller was cancelled, nobody needs the response
+                if self._pending.get(key) is request:
+                    del self._pending[key]
+                request.cancel()
+
+    def _request_done(
+        self,
+        key: Tuple[Any, ...],
+        ttl: float,
+        request: "asyncio.Future[Dict[str, Any]]",
+    ) -> None:
+        if self._pending.get(key) is request:
+            del self._pending[key]
+        if request.cancelled() or request.exception() is not None or ttl <= 0:
+            return
+        self._cache[key] = (time.monotonic() + ttl, request.result())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _is_transient(err: FroniusError) -> bool:
+        if isinstance(err, BadStatusError):
+            return err.code in TRANSIENT_STATUS_CODES
+        return isinstance(err, FroniusConnectionError) and not isinstance(
+            err, CircuitOpenError
+        )
+
+    async def _request_data(
+        self,
+        fun: Callable[[Dict[str, Any]], Dict[str, Any]],
+        endpoint: str,
+        *spec_formattings: str,
+    ) -> Dict[str, Any]:
+        """
+        Request and convert data, retrying transient failures
+        with jittered exponential back-off
         """
-        return sensor_data["status"]["Reason"]
+        attempt = 0
+        while True:
+            try:
+                return await self._fetch_data(fun, endpoint, *spec_formattings)
+            except FroniusError as err:
+                self._endpoint_stats(endpoint).count_error(
+                    type(err).__name__,
+                    err.code if isinstance(err, BadStatusError) else None,
+                )
+                if attempt >= self.retries or not self._is_transient(err):
+                    raise
+                backoff = min(self.retry_backoff * 2**attempt, self.retry_backoff_max)
+                delay = random.uniform(0, backoff)
+                attempt += 1
+                _LOGGER.debug(
+                    "Retrying %s in %.2fs (%s/%s) after: %s",
+                    endpoint,
+                    delay,
+                    attempt,
+                    self.retries,
+                    err,
+                )
+            await asyncio.sleep(delay)
 
-    async def _current_data(
+    async def _fetch_data(
         self,
         fun: Callable[[Dict[str, Any]], Dict[str, Any]],
-        spec: Dict[API_VERSION, str],
-        spec_name: str,
+        endpoint: str,
         *spec_formattings: str,
     ) -> Dict[str, Any]:
-        sensor = {}
+        spec, spec_name = ENDPOINTS[endpoint]
+        devices = tuple(str(f) for f in spec_formattings)
+        fingerprint = None
+        stats = self._endpoint_stats(endpoint)
         try:
-            res = await self._fetch_solar_api(spec, spec_name, *spec_formattings)
+            with self._span("url", endpoint):
+                url = await self._solar_api_url(spec, spec_name, *spec_formattings)
+            with self._span("fetch", endpoint):
+                raw = await self._fetch_raw(url, self.timeouts.get(endpoint), stats)
+            if self.tracer is not None:
+                self.tracer.capture(endpoint, url, raw)
+            if self.skip_unchanged == "body":
+                fingerprint = hash(raw)
+                previous = self._unchanged_data(fun, endpoint, devices, fingerprint)
+                if previous is not None:
+                    return previous
+            received = time.monotonic()
+            with self._span("decode", endpoint):
+                res = self._decode_json(raw, url, self.json_codec)
+            decoded = time.monotonic()
+            stats.latency["decode"].observe(decoded - received)
         except InvalidAnswerError:
             # except if Host returns 404
             raise NotSupportedError(
                 "Device type {} not supported by the fronius device".format(spec_name)
             )
 
+        with self._span("status", endpoint):
+            sensor = Fronius._response_status(
+                res, spec, spec_formattings, spec[self.api_version]
+            )
+        if self.skip_unchanged == "timestamp":
+            fingerprint = sensor["timestamp"]["value"]
+            previous = self._unchanged_data(fun, endpoint, devices, fingerprint)
+            if previous is not None:
+                return previous
+        with self._span("convert", endpoint):
+            sensor = Fronius._response_data(
+                sensor, res, fun, endpoint, self.output_format, spec, spec_formattings
+            )
+        if fingerprint is not None:
+            self._fingerprints[(endpoint, devices)] = (fun, fingerprint, sensor)
+        stats.latency["convert"].observe(time.monotonic() - decoded)
+        return sensor
+
+    @staticmethod
+    def _response_status(
+        res: Dict[str, Any],
+        spec: Dict[API_VERSION, str],
+        spec_formattings: Tuple[str, ...],
+        url: str,
+    ) -> Dict[str, Any]:
+        """
+        Convert the header of a decoded response and check its status
+        :param url: The url reported by BadStatusError
+        """
         try:
-            sensor.update(Fronius._status_data(res))
+            sensor = Fronius._status_data(res)
         except (TypeError, KeyError):
             raise InvalidAnswerError(
                 "No header data returned from {} ({})".format(spec, spec_formattings)
             )
-        else:
-            if sensor["status"]["Code"] != 0:
-                endpoint = spec[self.api_version]
-                code = sensor["status"]["Code"]
-                reason = sensor["status"]["Reason"]
-                raise BadStatusError(endpoint, code, reason=reason, response=sensor)
+        if sensor["status"]["Code"] != 0:
+            code = sensor["status"]["Code"]
+            reason = sensor["status"]["Reason"]
+            raise BadStatusError(url, code, reason=reason, response=sensor)
+        return sensor
+
+    @staticmethod
+    def _response_data(
+        sensor: Dict[str, Any],
+        res: Dict[str, Any],
+        fun: Callable[[Dict[str, Any]], Dict[str, Any]],
+        endpoint: str,
+        output_format: str,
+        spec: Dict[API_VERSION, str],
+        spec_formattings: Tuple[str, ...],
+    ) -> Dict[str, Any]:
+        """
+        Add the converted body of a decoded response to its converted header
+        """
         try:
             sensor.update(fun(res["Body"]["Data"]))
         except (TypeError, KeyError):
@@ -388,181 +1807,183 @@ class Fronius:
                 raise InvalidAnswerError(
                     "No body data returned from {} ({})".format(spec, spec_formattings)
                 )
+        if fun is _ENDPOINT_CONVERTERS[endpoint] or isinstance(fun, _Projection):
+            if output_format == "records":
+                return as_records(endpoint, sensor)
+            if output_format == "values":
+                return as_values(endpoint, sensor)
         return sensor
 
+    def _unchanged_data(
+        self,
+        fun: Callable[[Dict[str, Any]], Dict[str, Any]],
+        endpoint: str,
+        devices: Tuple[str, ...],
+        fingerprint: Any,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        The previous converted data if the response has the same fingerprint
+        """
+        previous = self._fingerprints.get((endpoint, devices))
+        if previous is None or previous[0] is not fun or previous[1] != fingerprint:
+            return None
+        self.unchanged_hits += 1
+        self._endpoint_stats(endpoint).unchanged_hits += 1
+        return previous[2]
+
     async def current_power_flow(
             self,
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current power flow of a smart meter system.
         """
-        cb = Fronius._system_power_flow
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(cb, URL_POWER_FLOW, "current power flow")
+        cb = Fronius._conversion("power_flow", ext_cb_conversion, fields)
+        return await self._current_data(cb, "power_flow")
 
     async def current_system_meter_data(
             self,
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current meter data.
         """
-        cb = Fronius._system_meter_data
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(cb, URL_SYSTEM_METER, "current system meter")
+        cb = Fronius._conversion("system_meter", ext_cb_conversion, fields)
+        return await self._current_data(cb, "system_meter")
 
     async def current_system_inverter_data(
             self,
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current inverter data.
         The values are provided as cumulated values and for each inverter
         """
-        cb = Fronius._system_inverter_data
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(
-            cb, URL_SYSTEM_INVERTER, "current system inverter")
+        cb = Fronius._conversion("system_inverter", ext_cb_conversion, fields)
+        return await self._current_data(cb, "system_inverter")
 
     async def current_system_ohmpilot_data(
             self,
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current ohmpilot data.
         """
-        cb = Fronius._system_ohmpilot_data
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(
-            cb, URL_SYSTEM_OHMPILOT, "current system ohmpilot")
+        cb = Fronius._conversion("system_ohmpilot", ext_cb_conversion, fields)
+        return await self._current_data(cb, "system_ohmpilot")
 
     async def current_meter_data(
             self,
             device: str = "0",
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current meter data for a device.
         """
-        cb = Fronius._device_meter_data
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(cb, URL_DEVICE_METER, "current meter", device)
+        cb = Fronius._conversion("device_meter", ext_cb_conversion, fields)
+        return await self._current_data(cb, "device_meter", device)
 
     async def current_storage_data(
             self,
             device: str = "0",
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current storage data for a device.
         Provides data about batteries.
         """
-        cb = Fronius._device_storage_data
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(
-            cb, URL_DEVICE_STORAGE, "current storage", device)
+        cb = Fronius._conversion("device_storage", ext_cb_conversion, fields)
+        return await self._current_data(cb, "device_storage", device)
 
     async def current_system_storage_data(
             self,
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current storage data for a device.
         Provides data about batteries.
         """
-        cb = Fronius._system_storage_data
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(
-            cb, URL_SYSTEM_STORAGE, "current system storage")
+        cb = Fronius._conversion("system_storage", ext_cb_conversion, fields)
+        return await self._current_data(cb, "system_storage")
 
     async def current_inverter_data(
             self,
             device: str = "1",
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current inverter data of one device.
         """
-        cb = Fronius._device_inverter_data
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(
-            cb, URL_DEVICE_INVERTER_COMMON, "current inverter", device)
+        cb = Fronius._conversion("device_inverter", ext_cb_conversion, fields)
+        return await self._current_data(cb, "device_inverter", device)
 
     async def current_inverter_3p_data(
             self,
             device: str = "1",
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current inverter 3 phase data of one device.
         """
-        cb = Fronius._device_inverter_3p_data
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(
-            cb, URL_DEVICE_INVERTER_3P, "current inverter 3p", device)
+        cb = Fronius._conversion("device_inverter_3p", ext_cb_conversion, fields)
+        return await self._current_data(cb, "device_inverter_3p", device)
 
     async def current_led_data(
             self,
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current info led data for all LEDs
         """
-        cb = Fronius._system_led_data
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(cb, URL_SYSTEM_LED, "current led")
+        cb = Fronius._conversion("system_led", ext_cb_conversion, fields)
+        return await self._current_data(cb, "system_led")
 
     async def current_active_device_info(
             self,
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get info about the current active devices in a smart meter system.
         """
-        cb = Fronius._system_active_device_info
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(
-            cb, URL_ACTIVE_DEVICE_INFO_SYSTEM, "current active device info")
+        cb = Fronius._conversion("active_device_info", ext_cb_conversion, fields)
+        return await self._current_data(cb, "active_device_info")
 
     async def current_logger_info(
             self,
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the current logger info of a smart meter system.
         """
-        cb = Fronius._logger_info
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(cb, URL_LOGGER_INFO, "current logger info")
+        cb = Fronius._conversion("logger_info", ext_cb_conversion, fields)
+        return await self._current_data(cb, "logger_info")
 
     async def inverter_info(
             self,
-            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None
+            ext_cb_conversion: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+            fields: Optional[Iterable[str]] = None,
     ) -> Dict[str, Any]:
         """
         Get the general infos of an inverter.
         """
-        cb = Fronius._inverter_info
-        if ext_cb_conversion is not None:
-            cb = ext_cb_conversion
-        return await self._current_data(cb, URL_INVERTER_INFO, "inverter info")
+        cb = Fronius._conversion("inverter_info", ext_cb_conversion, fields)
+        return await self._current_data(cb, "inverter_info")
 
     @staticmethod
     def _system_led_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting system led data: '{}'".format(data))
+        _LOGGER.debug("Converting system led data: '%s'", data)
         sensor = {}
 
         _map = {
@@ -583,19 +2004,27 @@ class Fronius:
 
     @staticmethod
     def _system_power_flow(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting system power flow data: '{}'".format(data))
+        _LOGGER.debug("Converting system power flow data: '%s'", data)
         sensor = {}
 
         site = data["Site"]
+        sensor.update(Fronius._power_flow_inverters(data["Inverters"]))
+        sensor.update(_convert_power_flow_site(site))
+
+        return sensor
+
+    @staticmethod
+    def _power_flow_inverters(inverters: Dict[str, Any]) -> Dict[str, Any]:
+        sensor = {}
         # Backwards compatability
-        if data["Inverters"].get("1"):
-            inverter = data["Inverters"]["1"]
+        if inverters.get("1"):
+            inverter = inverters["1"]
             if "Battery_Mode" in inverter:
                 sensor["battery_mode"] = {"value": inverter["Battery_Mode"]}
             if "SOC" in inverter:
                 sensor["state_of_charge"] = {"value": inverter["SOC"], "unit": PERCENT}
 
-        for index, inverter in enumerate(data["Inverters"]):
+        for index, inverter in enumerate(inverters):
             if "Battery_Mode" in inverter:
                 sensor["battery_mode_{}".format(index)] = {
                     "value": inverter["Battery_Mode"]
@@ -606,44 +2035,11 @@ class Fronius:
                     "unit": PERCENT,
                 }
 
-        if "BackupMode" in site:
-            sensor["backup_mode"] = {"value": site["BackupMode"]}
-        if "BatteryStandby" in site:
-            sensor["battery_standby"] = {"value": site["BatteryStandby"]}
-        if "E_Day" in site:
-            sensor["energy_day"] = {"value": site["E_Day"], "unit": WATT_HOUR}
-        if "E_Total" in site:
-            sensor["energy_total"] = {"value": site["E_Total"], "unit": WATT_HOUR}
-        if "E_Year" in site:
-            sensor["energy_year"] = {"value": site["E_Year"], "unit": WATT_HOUR}
-        if "Meter_Location" in site:
-            sensor["meter_location"] = {"value": site["Meter_Location"]}
-        if "Mode" in site:
-            sensor["meter_mode"] = {"value": site["Mode"]}
-        if "P_Akku" in site:
-            sensor["power_battery"] = {"value": site["P_Akku"], "unit": WATT}
-        if "P_Grid" in site:
-            sensor["power_grid"] = {"value": site["P_Grid"], "unit": WATT}
-        if "P_Load" in site:
-            sensor["power_load"] = {"value": site["P_Load"], "unit": WATT}
-        if "P_PV" in site:
-            sensor["power_photovoltaics"] = {"value": site["P_PV"], "unit": WATT}
-        if "rel_Autonomy" in site:
-            sensor["relative_autonomy"] = {
-                "value": site["rel_Autonomy"],
-                "unit": PERCENT,
-            }
-        if "rel_SelfConsumption" in site:
-            sensor["relative_self_consumption"] = {
-                "value": site["rel_SelfConsumption"],
-                "unit": PERCENT,
-            }
-
         return sensor
 
     @staticmethod
     def _system_meter_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting system meter data: '{}'".format(data))
+        _LOGGER.debug("Converting system meter data: '%s'", data)
 
         sensor: Dict[str, Dict[str, Dict[str, Any]]] = {"meters": {}}
 
@@ -654,7 +2050,7 @@ class Fronius:
 
     @staticmethod
     def _system_inverter_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting system inverter data: '{}'".format(data))
+        _LOGGER.debug("Converting system inverter data: '%s'", data)
         sensor: Dict[str, Dict[str, Any]] = {}
 
         sensor["energy_day"] = {"value": 0, "unit": WATT_HOUR}
@@ -702,46 +2098,12 @@ class Fronius:
 
     @staticmethod
     def _device_ohmpilot_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting ohmpilot data from '{}'".format(data))
-        device = {}
-
-        if "CodeOfError" in data:
-            device["error_code"] = {"value": data["CodeOfError"]}
-
-        if "CodeOfState" in data:
-            state_code = data["CodeOfState"]
-            device["state_code"] = {"value": state_code}
-            device["state_message"] = {
-                "value": OHMPILOT_STATE_CODES.get(state_code, "Unknown")
-            }
-
-        if "Details" in data:
-            device["hardware"] = {"value": data["Details"]["Hardware"]}
-            device["manufacturer"] = {"value": data["Details"]["Manufacturer"]}
-            device["model"] = {"value": data["Details"]["Model"]}
-            device["serial"] = {"value": data["Details"]["Serial"]}
-            device["software"] = {"value": data["Details"]["Software"]}
-
-        if "EnergyReal_WAC_Sum_Consumed" in data:
-            device["energy_real_ac_consumed"] = {
-                "value": data["EnergyReal_WAC_Sum_Consumed"],
-                "unit": WATT_HOUR,
-            }
-
-        if "PowerReal_PAC_Sum" in data:
-            device["power_real_ac"] = {"value": data["PowerReal_PAC_Sum"], "unit": WATT}
-
-        if "Temperature_Channel_1" in data:
-            device["temperature_channel_1"] = {
-                "value": data["Temperature_Channel_1"],
-                "unit": DEGREE_CELSIUS,
-            }
-
-        return device
+        _LOGGER.debug("Converting ohmpilot data from '%s'", data)
+        return _convert_ohmpilot(data)
 
     @staticmethod
     def _system_ohmpilot_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting system ohmpilot data: '{}'".format(data))
+        _LOGGER.debug("Converting system ohmpilot data: '%s'", data)
         sensor: Dict[str, Dict[str, Dict[str, Any]]] = {"ohmpilots": {}}
 
         for device_id, device_data in data.items():
@@ -751,217 +2113,12 @@ class Fronius:
 
     @staticmethod
     def _device_meter_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting meter data: '{}'".format(data))
-
-        meter = {}
-
-        if "Current_AC_Phase_1" in data:
-            meter["current_ac_phase_1"] = {
-                "value": data["Current_AC_Phase_1"],
-                "unit": AMPERE,
-            }
-        if "ACBRIDGE_CURRENT_ACTIVE_MEAN_01_F32" in data:
-            meter["current_ac_phase_1"] = {
-                "value": data["ACBRIDGE_CURRENT_ACTIVE_MEAN_01_F32"],
-                "unit": AMPERE,
-            }
-        if "Current_AC_Phase_2" in data:
-            meter["current_ac_phase_2"] = {
-                "value": data["Current_AC_Phase_2"],
-                "unit": AMPERE,
-            }
-        if "ACBRIDGE_CURRENT_ACTIVE_MEAN_02_F32" in data:
-            meter["current_ac_phase_2"] = {
-                "value": data["ACBRIDGE_CURRENT_ACTIVE_MEAN_02_F32"],
-                "unit": AMPERE,
-            }
-        if "Current_AC_Phase_3" in data:
-            meter["current_ac_phase_3"] = {
-                "value": data["Current_AC_Phase_3"],
-                "unit": AMPERE,
-            }
-        if "ACBRIDGE_CURRENT_ACTIVE_MEAN_03_F32" in data:
-            meter["current_ac_phase_3"] = {
-                "value": data["ACBRIDGE_CURRENT_ACTIVE_MEAN_03_F32"],
-                "unit": AMPERE,
-            }
-        if "EnergyReactive_VArAC_Sum_Consumed" in data:
-            meter["energy_reactive_ac_consumed"] = {
-                "value": data["EnergyReactive_VArAC_Sum_Consumed"],
-                "unit": VOLTAMPEREREACTIVE_HOUR,
-            }
-        if "EnergyReactive_VArAC_Sum_Produced" in data:
-            meter["energy_reactive_ac_produced"] = {
-                "value": data["EnergyReactive_VArAC_Sum_Produced"],
-                "unit": VOLTAMPEREREACTIVE_HOUR,
-            }
-        if "EnergyReal_WAC_Minus_Absolute" in data:
-            meter["energy_real_ac_minus"] = {
-                "value": data["EnergyReal_WAC_Minus_Absolute"],
-                "unit": WATT_HOUR,
-            }
-        if "EnergyReal_WAC_Plus_Absolute" in data:
-            meter["energy_real_ac_plus"] = {
-                "value": data["EnergyReal_WAC_Plus_Absolute"],
-                "unit": WATT_HOUR,
-            }
-        if "EnergyReal_WAC_Sum_Consumed" in data:
-            meter["energy_real_consumed"] = {
-                "value": data["EnergyReal_WAC_Sum_Consumed"],
-                "unit": WATT_HOUR,
-            }
-        if "SMARTMETER_ENERGYACTIVE_CONSUMED_SUM_F64" in data:
-            meter["energy_real_consumed"] = {
-                "value": data["SMARTMETER_ENERGYACTIVE_CONSUMED_SUM_F64"],
-                "unit": WATT_HOUR,
-            }
-        if "EnergyReal_WAC_Sum_Produced" in data:
-            meter["energy_real_produced"] = {
-                "value": data["EnergyReal_WAC_Sum_Produced"],
-                "unit": WATT_HOUR,
-            }
-        if "SMARTMETER_ENERGYACTIVE_PRODUCED_SUM_F64" in data:
-            meter["energy_real_produced"] = {
-                "value": data["SMARTMETER_ENERGYACTIVE_PRODUCED_SUM_F64"],
-                "unit": WATT_HOUR,
-            }
-        if "Frequency_Phase_Average" in data:
-            meter["frequency_phase_average"] = {
-                "value": data["Frequency_Phase_Average"],
-                "unit": HERTZ,
-            }
-        if "PowerApparent_S_Phase_1" in data:
-            meter["power_apparent_phase_1"] = {
-                "value": data["PowerApparent_S_Phase_1"],
-                "unit": VOLTAMPERE,
-            }
-        if "PowerApparent_S_Phase_2" in data:
-            meter["power_apparent_phase_2"] = {
-                "value": data["PowerApparent_S_Phase_2"],
-                "unit": VOLTAMPERE,
-            }
-        if "PowerApparent_S_Phase_3" in data:
-            meter["power_apparent_phase_3"] = {
-                "value": data["PowerApparent_S_Phase_3"],
-                "unit": VOLTAMPERE,
-            }
-        if "PowerApparent_S_Sum" in data:
-            meter["power_apparent"] = {
-                "value": data["PowerApparent_S_Sum"],
-                "unit": VOLTAMPERE,
-            }
-        if "PowerFactor_Phase_1" in data:
-            meter["power_factor_phase_1"] = {
-                "value": data["PowerFactor_Phase_1"],
-            }
-        if "PowerFactor_Phase_2" in data:
-            meter["power_factor_phase_2"] = {
-                "value": data["PowerFactor_Phase_2"],
-            }
-        if "PowerFactor_Phase_3" in data:
-            meter["power_factor_phase_3"] = {
-                "value": data["PowerFactor_Phase_3"],
-            }
-        if "PowerFactor_Sum" in data:
-            meter["power_factor"] = {"value": data["PowerFactor_Sum"]}
-        if "PowerReactive_Q_Phase_1" in data:
-            meter["power_reactive_phase_1"] = {
-                "value": data["PowerReactive_Q_Phase_1"],
-                "unit": VOLTAMPEREREACTIVE,
-            }
-        if "PowerReactive_Q_Phase_2" in data:
-            meter["power_reactive_phase_2"] = {
-                "value": data["PowerReactive_Q_Phase_2"],
-                "unit": VOLTAMPEREREACTIVE,
-            }
-        if "PowerReactive_Q_Phase_3" in data:
-            meter["power_reactive_phase_3"] = {
-                "value": data["PowerReactive_Q_Phase_3"],
-                "unit": VOLTAMPEREREACTIVE,
-            }
-        if "PowerReactive_Q_Sum" in data:
-            meter["power_reactive"] = {
-                "value": data["PowerReactive_Q_Sum"],
-                "unit": VOLTAMPEREREACTIVE,
-            }
-        if "PowerReal_P_Phase_1" in data:
-            meter["power_real_phase_1"] = {
-                "value": data["PowerReal_P_Phase_1"],
-                "unit": WATT,
-            }
-        if "SMARTMETER_POWERACTIVE_01_F64" in data:
-            meter["power_real_phase_1"] = {
-                "value": data["SMARTMETER_POWERACTIVE_01_F64"],
-                "unit": WATT,
-            }
-        if "PowerReal_P_Phase_2" in data:
-            meter["power_real_phase_2"] = {
-                "value": data["PowerReal_P_Phase_2"],
-                "unit": WATT,
-            }
-        if "SMARTMETER_POWERACTIVE_02_F64" in data:
-            meter["power_real_phase_2"] = {
-                "value": data["SMARTMETER_POWERACTIVE_02_F64"],
-                "unit": WATT,
-            }
-        if "PowerReal_P_Phase_3" in data:
-            meter["power_real_phase_3"] = {
-                "value": data["PowerReal_P_Phase_3"],
-                "unit": WATT,
-            }
-        if "SMARTMETER_POWERACTIVE_03_F64" in data:
-            meter["power_real_phase_3"] = {
-                "value": data["SMARTMETER_POWERACTIVE_03_F64"],
-                "unit": WATT,
-            }
-        if "PowerReal_P_Sum" in data:
-            meter["power_real"] = {"value": data["PowerReal_P_Sum"], "unit": WATT}
-        if "Voltage_AC_Phase_1" in data:
-            meter["voltage_ac_phase_1"] = {
-                "value": data["Voltage_AC_Phase_1"],
-                "unit": VOLT,
-            }
-        if "Voltage_AC_Phase_2" in data:
-            meter["voltage_ac_phase_2"] = {
-                "value": data["Voltage_AC_Phase_2"],
-                "unit": VOLT,
-            }
-        if "Voltage_AC_Phase_3" in data:
-            meter["voltage_ac_phase_3"] = {
-                "value": data["Voltage_AC_Phase_3"],
-                "unit": VOLT,
-            }
-        if "Voltage_AC_PhaseToPhase_12" in data:
-            meter["voltage_ac_phase_to_phase_12"] = {
-                "value": data["Voltage_AC_PhaseToPhase_12"],
-                "unit": VOLT,
-            }
-        if "Voltage_AC_PhaseToPhase_23" in data:
-            meter["voltage_ac_phase_to_phase_23"] = {
-                "value": data["Voltage_AC_PhaseToPhase_23"],
-                "unit": VOLT,
-            }
-        if "Voltage_AC_PhaseToPhase_31" in data:
-            meter["voltage_ac_phase_to_phase_31"] = {
-                "value": data["Voltage_AC_PhaseToPhase_31"],
-                "unit": VOLT,
-            }
-        if "Meter_Location_Current" in data:
-            meter["meter_location"] = {"value": data["Meter_Location_Current"]}
-        if "Enable" in data:
-            meter["enable"] = {"value": data["Enable"]}
-        if "Visible" in data:
-            meter["visible"] = {"value": data["Visible"]}
-        if "Details" in data:
-            meter["manufacturer"] = {"value": data["Details"]["Manufacturer"]}
-            meter["model"] = {"value": data["Details"]["Model"]}
-            meter["serial"] = {"value": data["Details"]["Serial"]}
-
-        return meter
+        _LOGGER.debug("Converting meter data: '%s'", data)
+        return _convert_meter(data)
 
     @staticmethod
     def _device_storage_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting storage data from '{}'".format(data))
+        _LOGGER.debug("Converting storage data from '%s'", data)
         sensor = {}
 
         if "Controller" in data:
@@ -980,7 +2137,7 @@ class Fronius:
 
     @staticmethod
     def _system_storage_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting system storage data: '{}'".format(data))
+        _LOGGER.debug("Converting system storage data: '%s'", data)
 
         sensor: Dict[str, Dict[str, Dict[str, Any]]] = {"storages": {}}
 
@@ -991,7 +2148,7 @@ class Fronius:
 
     @staticmethod
     def _device_inverter_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting inverter data from '{}'".format(data))
+        _LOGGER.debug("Converting inverter data from '%s'", data)
         sensor = {}
 
         if "DAY_ENERGY" in data:
@@ -1069,7 +2226,7 @@ class Fronius:
 
     @staticmethod
     def _device_inverter_3p_data(data):
-        _LOGGER.debug("Converting inverter 3p data from '{}'".format(data))
+        _LOGGER.debug("Converting inverter 3p data from '%s'", data)
         sensor = {}
         if "IAC_L1" in data:
             sensor["current_ac_phase_1"] = {
@@ -1105,115 +2262,15 @@ class Fronius:
 
     @staticmethod
     def _controller_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        controller = {}
-
-        if "Capacity_Maximum" in data:
-            controller["capacity_maximum"] = {
-                "value": data["Capacity_Maximum"],
-                "unit": "Ah",
-            }
-        if "DesignedCapacity" in data:
-            controller["capacity_designed"] = {
-                "value": data["DesignedCapacity"],
-                "unit": "Ah",
-            }
-        if "Current_DC" in data:
-            controller["current_dc"] = {"value": data["Current_DC"], "unit": AMPERE}
-        if "Voltage_DC" in data:
-            controller["voltage_dc"] = {"value": data["Voltage_DC"], "unit": VOLT}
-        if "Voltage_DC_Maximum_Cell" in data:
-            controller["voltage_dc_maximum_cell"] = {
-                "value": data["Voltage_DC_Maximum_Cell"],
-                "unit": VOLT,
-            }
-        if "Voltage_DC_Minimum_Cell" in data:
-            controller["voltage_dc_minimum_cell"] = {
-                "value": data["Voltage_DC_Minimum_Cell"],
-                "unit": VOLT,
-            }
-        if "StateOfCharge_Relative" in data:
-            controller["state_of_charge"] = {
-                "value": data["StateOfCharge_Relative"],
-                "unit": PERCENT,
-            }
-        if "Temperature_Cell" in data:
-            controller["temperature_cell"] = {
-                "value": data["Temperature_Cell"],
-                "unit": DEGREE_CELSIUS,
-            }
-        if "Enable" in data:
-            controller["enable"] = {"value": data["Enable"]}
-        if "Details" in data:
-            controller["manufacturer"] = {"value": data["Details"]["Manufacturer"]}
-            controller["model"] = {"value": data["Details"]["Model"]}
-            controller["serial"] = {"value": data["Details"]["Serial"]}
-
-        return controller
+        return _convert_storage_controller(data)
 
     @staticmethod
     def _module_data(data: Dict[str, Any]) -> Dict[str, Any]:
-        module = {}
-
-        if "Capacity_Maximum" in data:
-            module["capacity_maximum"] = {
-                "value": data["Capacity_Maximum"],
-                "unit": "Ah",
-            }
-        if "DesignedCapacity" in data:
-            module["capacity_designed"] = {
-                "value": data["DesignedCapacity"],
-                "unit": "Ah",
-            }
-        if "Current_DC" in data:
-            module["current_dc"] = {"value": data["Current_DC"], "unit": AMPERE}
-        if "Voltage_DC" in data:
-            module["voltage_dc"] = {"value": data["Voltage_DC"], "unit": VOLT}
-        if "Voltage_DC_Maximum_Cell" in data:
-            module["voltage_dc_maximum_cell"] = {
-                "value": data["Voltage_DC_Maximum_Cell"],
-                "unit": VOLT,
-            }
-        if "Voltage_DC_Minimum_Cell" in data:
-            module["voltage_dc_minimum_cell"] = {
-                "value": data["Voltage_DC_Minimum_Cell"],
-                "unit": VOLT,
-            }
-        if "StateOfCharge_Relative" in data:
-            module["state_of_charge"] = {
-                "value": data["StateOfCharge_Relative"],
-                "unit": PERCENT,
-            }
-        if "Temperature_Cell" in data:
-            module["temperature_cell"] = {
-                "value": data["Temperature_Cell"],
-                "unit": DEGREE_CELSIUS,
-            }
-        if "Temperature_Cell_Maximum" in data:
-            module["temperature_cell_maximum"] = {
-                "value": data["Temperature_Cell_Maximum"],
-                "unit": DEGREE_CELSIUS,
-            }
-        if "Temperature_Cell_Minimum" in data:
-            module["temperature_cell_minimum"] = {
-                "value": data["Temperature_Cell_Minimum"],
-                "unit": DEGREE_CELSIUS,
-            }
-        if "CycleCount_BatteryCell" in data:
-            module["cycle_count_cell"] = {"value": data["CycleCount_BatteryCell"]}
-        if "Status_BatteryCell" in data:
-            module["status_cell"] = {"value": data["Status_BatteryCell"]}
-        if "Enable" in data:
-            module["enable"] = {"value": data["Enable"]}
-        if "Details" in data:
-            module["manufacturer"] = {"value": data["Details"]["Manufacturer"]}
-            module["model"] = {"value": data["Details"]["Model"]}
-            module["serial"] = {"value": data["Details"]["Serial"]}
-
-        return module
+        return _convert_storage_module(data)
 
     @staticmethod
     def _system_active_device_info(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting system active device data: '{}'".format(data))
+        _LOGGER.debug("Converting system active device data: '%s'", data)
         sensor = {}
 
         if "Inverter" in data:
@@ -1278,7 +2335,7 @@ class Fronius:
     @staticmethod
     def _inverter_info(data: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
         """Parse inverter info."""
-        _LOGGER.debug("Converting inverter info: '{}'".format(data))
+        _LOGGER.debug("Converting inverter info: '%s'", data)
         inverters = []
         for inverter_index, inverter_info in data.items():
             inverter = {
@@ -1310,7 +2367,7 @@ class Fronius:
 
     @staticmethod
     def _logger_info(data: Dict[str, Any]) -> Dict[str, Any]:
-        _LOGGER.debug("Converting Logger info: '{}'".format(data))
+        _LOGGER.debug("Converting Logger info: '%s'", data)
         sensor = {}
 
         if "CO2Factor" in data and "CO2Unit" in data:
@@ -1333,28 +2390,575 @@ class Fronius:
                     "unit": f"{cash_currency}/kWh",
                 }
 
-        if "HWVersion" in data:
-            sensor["hardware_version"] = {"value": data["HWVersion"]}
+        sensor.update(_convert_logger_info(data))
+
+        return sensor
+
+
+# Default conversion of the endpoints in ENDPOINTS
+_ENDPOINT_CONVERTERS: Final[Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = {
+    "active_device_info": Fronius._system_active_device_info,
+    "inverter_info": Fronius._inverter_info,
+    "logger_info": Fronius._logger_info,
+    "power_flow": Fronius._system_power_flow,
+    "system_meter": Fronius._system_meter_data,
+    "system_inverter": Fronius._system_inverter_data,
+    "system_ohmpilot": Fronius._system_ohmpilot_data,
+    "system_storage": Fronius._system_storage_data,
+    "system_led": Fronius._system_led_data,
+    "device_meter": Fronius._device_meter_data,
+    "device_storage": Fronius._device_storage_data,
+    "device_inverter": Fronius._device_inverter_data,
+    "device_inverter_3p": Fronius._device_inverter_3p_data,
+}
+
+
+class _Projection:
+    """Default conversion of an endpoint converting only the given fields."""
+
+    __slots__ = ("endpoint", "fields", "convert")
+
+    def __init__(
+        self,
+        endpoint: str,
+        fields: FrozenSet[str],
+        convert: Callable[[Dict[str, Any]], Dict[str, Any]],
+    ) -> None:
+        self.endpoint = endpoint
+        self.fields = fields
+        self.convert = convert
+
+    def __call__(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return self.convert(data)
+
+
+def _item_fields(
+    fields: FrozenSet[str], collection: str, item_fields: Iterable[str]
+) -> FrozenSet[str]:
+    """
+    Fields to convert of the items of a collection,
+    all fields if the collection itself is requested
+    """
+    if collection in fields:
+        return frozenset(item_fields)
+    return fields.intersection(item_fields)
+
+
+def _project(
+    converted: Dict[Any, Any], fields: FrozenSet[str], schema: Dict[str, FieldSchema]
+) -> Dict[Any, Any]:
+    """
+    Keep the given fields of converted data,
+    collections keep all items with the requested fields
+    """
+    projected: Dict[Any, Any] = {}
+    for name, item in converted.items():
+        field = schema.get(name)
+        if field is not None and field.fields is not None:
+            item_fields = _item_fields(fields, name, field.fields)
+            if isinstance(item, list):
+                projected[name] = [_project(i, item_fields, field.fields) for i in item]
+            else:
+                projected[name] = {
+                    i: _project(d, item_fields, field.fields) for i, d in item.items()
+                }
+        elif name in fields:
+            projected[name] = item
+    return projected
+
+
+def _subset(rows: Iterable[FieldMapping], fields: FrozenSet[str]) -> Callable[..., Any]:
+    return _compile_fields(row for row in rows if row.target in fields)
+
 
-        if "SWVersion" in data:
-            sensor["software_version"] = {"value": data["SWVersion"]}
+def _by_device(
+    collection: str, convert: Callable[[Dict[str, Any]], Dict[str, Any]]
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    def convert_devices(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {collection: {device_id: convert(d) for device_id, d in data.items()}}
 
-        if "PlatformID" in data:
-            sensor["hardware_platform"] = {"value": data["PlatformID"]}
+    return convert_devices
 
-        if "ProductID" in data:
-            sensor["product_type"] = {"value": data["ProductID"]}
 
-        if "TimezoneLocation" in data:
-            sensor["time_zone_location"] = {"value": data["TimezoneLocation"]}
+def _storage_projection(
+    fields: FrozenSet[str],
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    controller = _subset(STORAGE_CONTROLLER_FIELDS, fields)
+    module = _subset(
+        STORAGE_MODULE_FIELDS,
+        _item_fields(fields, "modules", _table_schema(STORAGE_MODULE_FIELDS)),
+    )
+
+    def convert(data: Dict[str, Any]) -> Dict[str, Any]:
+        sensor = {}
+        if "Controller" in data:
+            sensor.update(controller(data["Controller"]))
+        if "Modules" in data:
+            sensor["modules"] = {
+                index: module(item) for index, item in enumerate(data["Modules"])
+            }
+        return sensor
 
-        if "TimezoneName" in data:
-            sensor["time_zone"] = {"value": data["TimezoneName"]}
+    return convert
 
-        if "UTCOffset" in data:
-            sensor["utc_offset"] = {"value": data["UTCOffset"]}
 
-        if "UniqueID" in data:
-            sensor["unique_identifier"] = {"value": data["UniqueID"]}
+def _power_flow_projection(
+    fields: FrozenSet[str],
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    site = _subset(POWER_FLOW_SITE_FIELDS, fields)
+    per_inverter = any(
+        field.startswith(("battery_mode", "state_of_charge")) for field in fields
+    )
 
+    def convert(data: Dict[str, Any]) -> Dict[str, Any]:
+        site_data = data["Site"]
+        sensor = {}
+        if per_inverter:
+            for name, item in Fronius._power_flow_inverters(data["Inverters"]).items():
+                if name in fields:
+                    sensor[name] = item
+        sensor.update(site(site_data))
         return sensor
+
+    return convert
+
+
+# Names of the per inverter fields of the power flow
+_PER_INVERTER_FIELD: Final = re.compile(r"(battery_mode|state_of_charge)_\d+")
+
+
+@functools.lru_cache(maxsize=None)
+def _field_names(endpoint: str) -> FrozenSet[str]:
+    """Names of the fields of an endpoint including the fields of its items"""
+    names = set()
+    for name, field in SCHEMA[endpoint].items():
+        names.add(name)
+        names.update(field.fields or ())
+    return frozenset(names)
+
+
+def _requested_fields(fields: Iterable[str]) -> FrozenSet[str]:
+    if isinstance(fields, str):
+        raise ValueError(
+            "Fields must be a collection of field names, got {!r}".format(fields)
+        )
+    return frozenset(fields)
+
+
+def _unknown_fields(endpoint: str, names: FrozenSet[str]) -> FrozenSet[str]:
+    """The names that are not fields of the endpoint, see SCHEMA"""
+    unknown = names - _field_names(endpoint)
+    if endpoint == "power_flow":
+        unknown = frozenset(n for n in unknown if not _PER_INVERTER_FIELD.fullmatch(n))
+    return unknown
+
+
+@functools.lru_cache(maxsize=256)
+def _projection(endpoint: str, fields: FrozenSet[str]) -> _Projection:
+    """
+    Build the default conversion of an endpoint converting only the given fields.
+    Fields of tables are converted by a converter compiled for the fields,
+    the per inverter fields of the power flow only if requested.
+    Other endpoints are converted completely and the other fields dropped.
+    """
+    convert: Callable[[Dict[str, Any]], Dict[str, Any]]
+    schema = SCHEMA[endpoint]
+    if endpoint == "device_meter":
+        convert = _subset(METER_FIELDS, fields)
+    elif endpoint == "device_storage":
+        convert = _storage_projection(fields)
+    elif endpoint == "power_flow":
+        convert = _power_flow_projection(fields)
+    elif endpoint == "system_meter":
+        meter_fields = _item_fields(fields, "meters", SCHEMA["device_meter"])
+        convert = _by_device("meters", _subset(METER_FIELDS, meter_fields))
+    elif endpoint == "system_storage":
+        storage_fields = _item_fields(fields, "storages", SCHEMA["device_storage"])
+        convert = _by_device("storages", _storage_projection(storage_fields))
+    elif endpoint == "system_ohmpilot":
+        ohmpilot_fields = _item_fields(
+            fields, "ohmpilots", _table_schema(OHMPILOT_FIELDS)
+        )
+        convert = _by_device("ohmpilots", _subset(OHMPILOT_FIELDS, ohmpilot_fields))
+    else:
+        default = _ENDPOINT_CONVERTERS[endpoint]
+
+        def convert(data: Dict[str, Any]) -> Dict[str, Any]:
+            return _project(default(data), fields, schema)
+
+    return _Projection(endpoint, fields, convert)
+
+
+def decode(
+    endpoint: str,
+    raw: Union[bytes, str],
+    fields: Optional[Iterable[str]] = None,
+    output_format: str = "dict",
+    json_codec: Optional[JsonCodec] = None,
+) -> Dict[str, Any]:
+    """
+    Convert a raw response of an endpoint like Fronius.current_* without
+    requesting a device, e.g. to process archived responses
+    :param endpoint: Name of the endpoint that returned the response,
+        see ENDPOINTS
+    :param raw: Undecoded body of the response
+    :param fields: Convert only these fields, see Fronius.current_*
+    :param output_format: "dict", "records" or "values", see Fronius
+    :param json_codec: JsonCodec decoding the body, DEFAULT_JSON_CODEC if None
+    :return: The converted response
+    """
+    return next(  # type: ignore[return-value]
+        decode_many(endpoint, (raw,), fields, output_format, json_codec)
+    )
+
+
+def decode_many(
+    endpoint: str,
+    raws: Iterable[Union[bytes, str]],
+    fields: Optional[Iterable[str]] = None,
+    output_format: str = "dict",
+    json_codec: Optional[JsonCodec] = None,
+    return_errors: bool = False,
+) -> Iterator[Union[Dict[str, Any], FroniusError]]:
+    """
+    Convert raw responses of an endpoint one by one as they are consumed,
+    the conversion is looked up once for all of them, see decode
+    :param raws: Undecoded bodies of the responses
+    :param return_errors: Yield the FroniusError of a response that cannot be
+        converted instead of raising it
+    :return: The converted responses in order
+    :raises ValueError: Right away for an unknown endpoint, output format or field
+    """
+    if endpoint not in ENDPOINTS:
+        raise ValueError("Unknown endpoint {}".format(endpoint))
+    if output_format not in ("dict", "records", "values"):
+        raise ValueError("Unknown output_format {}".format(output_format))
+    spec = ENDPOINTS[endpoint][0]
+    fun = Fronius._conversion(endpoint, None, fields)
+    codec = json_codec or DEFAULT_JSON_CODEC
+
+    def convert() -> Iterator[Union[Dict[str, Any], FroniusError]]:
+        for raw in raws:
+            result: Union[Dict[str, Any], FroniusError]
+            try:
+                if isinstance(raw, str):
+                    raw = raw.encode("utf-8")
+                res = Fronius._decode_json(raw, endpoint, codec)
+                sensor = Fronius._response_status(res, spec, (), endpoint)
+                result = Fronius._response_data(
+                    sensor, res, fun, endpoint, output_format, spec, ()
+                )
+            except FroniusError as err:
+                if not return_errors:
+                    raise
+                result = err
+            yield result
+
+    return convert()
+
+
+class FleetCycleStats(NamedTuple):
+    """Statistics of a single polling cycle of a FroniusFleet."""
+
+    wall_time: float
+    polled: int
+    skipped: int
+    # devices of which every request failed or missed the deadline
+    failed: int
+
+
+class FroniusFleet:
+    """
+    Poll many Fronius devices from one process with bounded concurrency
+    Attributes:
+        session     The AIO session shared by all devices
+        hosts       The urls of the Fronius devices
+        api_version  Version of Fronius API to use for all devices
+        max_in_flight   Maximum number of devices fetched at the same time
+        max_in_flight_per_host  Maximum number of concurrent fetch cycles of one
+                    device, devices at this limit are skipped for the cycle
+        jitter      Maximum random delay in seconds before a device is fetched,
+                    spreads the start times of a cycle
+        fronius_options  Keyword arguments passed to the Fronius of every device,
+                    e.g. max_in_flight to limit the concurrent requests of a
+                    fetch cycle per device or breaker_threshold
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        hosts: Iterable[str],
+        api_version: API_VERSION = API_VERSION.AUTO,
+        max_in_flight: int = 32,
+        max_in_flight_per_host: int = 1,
+        jitter: float = 0.0,
+        fronius_options: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Constructor
+        """
+        self.fronii: Dict[str, Fronius] = {
+            host: Fronius(session, host, api_version, **(fronius_options or {}))
+            for host in hosts
+        }
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_per_host = max_in_flight_per_host
+        self.jitter = jitter
+        self.last_cycle: Optional[FleetCycleStats] = None
+        self._in_flight: Dict[str, int] = {host: 0 for host in self.fronii}
+        # created lazily to bind to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def fetch(self, **kwargs: Any) -> AsyncIterator[Tuple[str, FetchResult]]:
+        """
+        Fetch all devices once, yielding (host, responses) as they complete.
+        Keyword arguments are passed on to Fronius.fetch.
+        Statistics of the cycle are stored in last_cycle once it is finished.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        start = time.monotonic()
+        skipped = 0
+        failed = 0
+        tasks = []
+        for host, fronius in self.fronii.items():
+            if self._in_flight[host] >= self.max_in_flight_per_host:
+                _LOGGER.debug("Skipping %s, previous fetch still running", host)
+                skipped += 1
+                continue
+            self._in_flight[host] += 1
+            tasks.append(asyncio.ensure_future(self._fetch_host(host, fronius, kwargs)))
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                host, result = await next_done
+                unanswered = len(result.failed) + len(result.missed)
+                if result.requested and unanswered == len(result.requested):
+                    failed += 1
+                yield host, result
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.last_cycle = FleetCycleStats(
+                wall_time=time.monotonic() - start,
+                polled=len(tasks),
+                skipped=skipped,
+                failed=failed,
+            )
+
+    async def _fetch_host(
+        self, host: str, fronius: Fronius, kwargs: Dict[str, Any]
+    ) -> Tuple[str, FetchResult]:
+        assert self._semaphore is not None
+        try:
+            if self.jitter > 0:
+                await asyncio.sleep(random.uniform(0, self.jitter))
+            async with self._semaphore:
+                return host, await fronius.fetch(**kwargs)
+        finally:
+            self._in_flight[host] -= 1
+
+    def stats(self) -> Dict[str, Dict[str, EndpointStats]]:
+        """
+        Metrics of the requests by endpoint name by host, see Fronius.stats
+        """
+        return {host: fronius.stats() for host, fronius in self.fronii.items()}
+
+    def prometheus_metrics(self) -> str:
+        """
+        The stats of all devices in the Prometheus text exposition format
+        """
+        return prometheus_text(
+            {fronius.url: fronius.stats() for fronius in self.fronii.values()}
+        )
+
+
+class SnapshotEntry(NamedTuple):
+    """Latest converted data of an endpoint held by a FroniusSnapshotStore."""
+
+    data: Dict[str, Any]
+    # seconds since the data was received
+    age: float
+    # failure of the latest refresh, the data is from the last successful one
+    error: Optional[FroniusError]
+
+
+class FroniusSnapshotStore:
+    """
+    Serve the latest data of a Fronius device to many readers.
+    Reads return the last converted response immediately, entries older than
+    their maximum age are refreshed by a single background task, so the
+    device load does not depend on the number of reads.
+    Only the first read of an endpoint waits for the device.
+    Returned data is shared and must not be modified.
+    Attributes:
+        fronius     The Fronius device to read from
+        max_age     Seconds after which an entry is refreshed by endpoint name,
+                    device scope endpoints may be given as (endpoint, device)
+        default_max_age  Seconds after which entries not in max_age are refreshed
+    """
+
+    def __init__(
+        self,
+        fronius: Fronius,
+        max_age: Optional[Dict[Union[str, Tuple[str, str]], float]] = None,
+        default_max_age: float = 5,
+    ) -> None:
+        """
+        Constructor
+        """
+        self.fronius = fronius
+        self.max_age: Dict[Union[str, Tuple[str, Optional[str]]], float] = {}
+        for name, age in (max_age or {}).items():
+            # names without device id apply to the endpoint of all devices
+            endpoint, device = _endpoint_key(name, any_device=True)
+            key = endpoint if device is None else (endpoint, device)
+            if age <= 0:
+                raise ValueError("Maximum age of {} must be positive".format(name))
+            self.max_age[key] = age
+        if default_max_age <= 0:
+            raise ValueError("Default maximum age must be positive")
+        self.default_max_age = default_max_age
+        # (endpoint, device) -> (monotonic time received, data)
+        self._entries: Dict[
+            Tuple[str, Optional[str]], Tuple[float, Dict[str, Any]]
+        ] = {}
+        self._errors: Dict[Tuple[str, Optional[str]], FroniusError] = {}
+        # monotonic time of the next refresh
+        self._due: Dict[Tuple[str, Optional[str]], float] = {}
+        # created lazily to bind to the running event loop
+        self._task: Optional["asyncio.Task[None]"] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def __aenter__(self) -> "FroniusSnapshotStore":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    async def get(self, endpoint: str, device: Optional[str] = None) -> SnapshotEntry:
+        """
+        Get the latest data of an endpoint, waiting for the device only
+        if there is no data yet
+        :param endpoint: Name of the endpoint as in ENDPOINTS
+        :param device: Device id of device scope endpoints
+        """
+        key = _endpoint_key(endpoint if device is None else (endpoint, str(device)))
+        entry = self._entries.get(key)
+        if entry is None:
+            # concurrent first reads are served by a single request
+            await self._refresh(key)
+            entry = self._entries[key]
+            self._start()
+        received, data = entry
+        return SnapshotEntry(data, time.monotonic() - received, self._errors.get(key))
+
+    def snapshot(self) -> Dict[Tuple[str, Optional[str]], SnapshotEntry]:
+        """
+        Get the latest data of all endpoints read so far
+        :return: The entries by (endpoint, device)
+        """
+        now = time.monotonic()
+        return {
+            key: SnapshotEntry(data, now - received, self._errors.get(key))
+            for key, (received, data) in self._entries.items()
+        }
+
+    def dumps(self, indent: bool = False) -> bytes:
+        """
+        Encode the snapshot as JSON with the json_codec of the device
+        :param indent: Indent the JSON for readability
+        :return: A list of objects with the endpoint, device, age in seconds,
+            error message of the latest refresh and data of every entry
+        """
+        return self.fronius.dumps(
+            [
+                {
+                    "endpoint": endpoint,
+                    "device": device,
+                    "age": entry.age,
+                    "error": None if entry.error is None else str(entry.error),
+                    "data": entry.data,
+                }
+                for (endpoint, device), entry in self.snapshot().items()
+            ],
+            indent,
+        )
+
+    async def close(self) -> None:
+        """
+        Stop refreshing, entries read so far stay available
+        """
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _entry_max_age(self, key: Tuple[str, Optional[str]]) -> float:
+        if key in self.max_age:
+            return self.max_age[key]
+        return self.max_age.get(key[0], self.default_max_age)
+
+    def _start(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.ensure_future(self._refresh_stale())
+        else:
+            assert self._wakeup is not None
+            # the new entry may be due before the next planned refresh
+            self._wakeup.set()
+
+    async def _refresh(self, key: Tuple[str, Optional[str]]) -> None:
+        try:
+            data = await self.fronius._endpoint_data(*key)
+        except FroniusError as err:
+            self._errors[key] = err
+            raise
+        finally:
+            # failed refreshes are retried once the entry would be stale again
+            self._due[key] = time.monotonic() + self._entry_max_age(key)
+        self._entries[key] = (time.monotonic(), data)
+        self._errors.pop(key, None)
+
+    async def _refresh_stale(self) -> None:
+        """
+        Refresh every stale entry on its own, so a slow endpoint does not
+        hold back the refreshes of the others
+        """
+        assert self._wakeup is not None
+        running: Dict["asyncio.Future[None]", Tuple[str, Optional[str]]] = {}
+        wakeup: Optional["asyncio.Future[Any]"] = None
+        try:
+            while True:
+                now = time.monotonic()
+                for key in self._entries:
+                    if key not in running.values() and self._due[key] <= now:
+                        running[asyncio.ensure_future(self._refresh(key))] = key
+                due = [
+                    self._due[key]
+                    for key in self._entries
+                    if key not in running.values()
+                ]
+                if wakeup is None or wakeup.done():
+                    self._wakeup.clear()
+                    wakeup = asyncio.ensure_future(self._wakeup.wait())
+                done, _ = await asyncio.wait(
+                    {wakeup, *running},
+                    timeout=min(due) - now if due else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                for request in done:
+                    key = running.pop(request, None)
+                    if key is not None and request.exception() is not None:
+                        _LOGGER.warning(
+                            "Refreshing %s failed, keeping previous data: %s",
+                            key,
+                            request.exception(),
+                        )
+        finally:
+            requests: List["asyncio.Future[Any]"] = list(running)
+            if wakeup is not None:
+                requests.append(wakeup)
+            await Fronius._cancel(requests)
@@ -0,0 +1,108 @@
+"""JSON codecs decoding responses and encoding converted data."""
+
+import functools
+import json
+from typing import Any, Callable, Final, NamedTuple, Optional
+
+from .records import FroniusRecord
+
+
+class JsonCodec(NamedTuple):
+    """
+    Functions decoding and encoding JSON
+    Attributes:
+        name        Name of the codec
+        loads       Decodes bytes, raising ValueError on invalid JSON
+        dumps       Encodes a value to compact bytes, encoding values that are
+                    not JSON types by _json_default
+        dumps_indented  Encodes a value to indented bytes, dumps if None
+    """
+
+    name: str
+    loads: Callable[[bytes], Any]
+    dumps: Callable[[Any], bytes]
+    dumps_indented: Optional[Callable[[Any], bytes]] = None
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, FroniusRecord):
+        return value.to_dict()
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return list(value)
+    raise TypeError(
+        "Object of type {} is not JSON serializable".format(type(value).__name__)
+    )
+
+
+def _stdlib_codec() -> JsonCodec:
+    return JsonCodec(
+        "json",
+        json.loads,
+        lambda value: json.dumps(
+            value, default=_json_default, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8"),
+        lambda value: json.dumps(
+            value, default=_json_default, indent=2, ensure_ascii=False
+        ).encode("utf-8"),
+    )
+
+
+def _orjson_codec() -> JsonCodec:
+    import orjson
+
+    # converted storage modules are keyed by int
+    option = orjson.OPT_NON_STR_KEYS
+    return JsonCodec(
+        "orjson",
+        orjson.loads,
+        functools.partial(orjson.dumps, default=_json_default, option=option),
+        functools.partial(
+            orjson.dumps, default=_json_default, option=option | orjson.OPT_INDENT_2
+        ),
+    )
+
+
+def _msgspec_codec() -> JsonCodec:
+    import msgspec
+
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder(enc_hook=_json_default)
+
+    def loads(raw: bytes) -> Any:
+        try:
+            return decoder.decode(raw)
+        except msgspec.DecodeError as err:
+            raise ValueError(str(err)) from err
+
+    return JsonCodec(
+        "msgspec",
+        loads,
+        encoder.encode,
+        lambda value: msgspec.json.format(encoder.encode(value), indent=2),
+    )
+
+
+_JSON_CODECS: Final = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _stdlib_codec,
+}
+
+
+def json_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    The JSON codec of the given library or the fastest installed one
+    :param name: "orjson", "msgspec" or "json" for the standard library,
+        None to use orjson or msgspec if installed and the standard library
+        otherwise
+    """
+    if name is not None:
+        if name not in _JSON_CODECS:
+            raise ValueError("Unknown JSON codec {}".format(name))
+        return _JSON_CODECS[name]()
+    for factory in (_orjson_codec, _msgspec_codec):
+        try:
+            return factory()
+        except ImportError:
+            continue
+    return _stdlib_codec()
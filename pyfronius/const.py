@@ -2,6 +2,17 @@
 
 from typing import Final
 
+DEGREE_CELSIUS: Final = "°C"
+WATT: Final = "W"
+WATT_HOUR: Final = "Wh"
+AMPERE: Final = "A"
+VOLT: Final = "V"
+PERCENT: Final = "%"
+HERTZ: Final = "Hz"
+VOLTAMPEREREACTIVE: Final = "VAr"
+VOLTAMPEREREACTIVE_HOUR: Final = "VArh"
+VOLTAMPERE: Final = "VA"
+
 INVERTER_DEVICE_TYPE: Final = {
     1: {"manufacturer": "Fronius", "model": "Gen24"},
     42: {"manufacturer": "Fronius", "model": "Symo Advanced 10.0-3-M"},
@@ -212,3 +223,8 @@ OHMPILOT_STATE_CODES: Final = {
     4: "Fault",
     5: "Boost mode",
 }
+
+# Inverter status codes while not producing, i.e. at night: 0-6 Startup, 8 Standby
+INVERTER_IDLE_STATUS_CODES: Final = frozenset({0, 1, 2, 3, 4, 5, 6, 8})
+# Inverter states reported by Gen24 inverters while not producing
+INVERTER_IDLE_STATES: Final = frozenset({"Sleeping", "Standby", "Startup"})
@@ -0,0 +1,204 @@
+"""Request metrics and profiling of Fronius devices."""
+
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Final, Iterator, Optional, Tuple
+
+# Upper bounds in seconds of the buckets of latency histograms
+LATENCY_BUCKETS: Final = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+# Stages of a request measured by EndpointStats: waiting for a slot of the
+# RequestLimiter, the HTTP request, decoding the JSON body and converting it
+REQUEST_STAGES: Final = ("queue", "network", "decode", "convert")
+# Stages of a request passed to the profile_hook of Fronius: building the url
+# including the API version discovery, the HTTP request including the queue,
+# decoding the JSON body, checking the header and converting the body
+PROFILE_STAGES: Final = ("url", "fetch", "decode", "status", "convert")
+
+
+class LatencyHistogram:
+    """
+    Distribution of the durations of a stage of requests
+    Attributes:
+        buckets     Upper bounds of the buckets in seconds
+        counts      Number of durations per bucket, the last one counting
+                    the durations above all bounds
+        count       Number of durations
+        sum         Total seconds of all durations
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        """
+        Constructor
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        """
+        Add a duration to the histogram
+        """
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+
+class EndpointStats:
+    """
+    Metrics of the requests of a single endpoint of a Fronius device
+    Attributes:
+        requests    Number of requests sent to the device, including retries
+        bytes_received  Total size of the received bodies
+        cache_hits  Number of calls served from the cache or by joining a
+                    pending identical request
+        unchanged_hits  Number of responses skipped by skip_unchanged
+        errors      Number of failed requests by name of the error class,
+                    BadStatusError by status code as well
+        latency     LatencyHistogram per stage, see REQUEST_STAGES
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor
+        """
+        self.requests = 0
+        self.bytes_received = 0
+        self.cache_hits = 0
+        self.unchanged_hits = 0
+        self.errors: Dict[Tuple[str, Optional[int]], int] = {}
+        self.latency: Dict[str, LatencyHistogram] = {
+            stage: LatencyHistogram() for stage in REQUEST_STAGES
+        }
+
+    def count_error(self, name: str, code: Optional[int] = None) -> None:
+        """
+        Count a failed request
+        :param name: Name of the error class
+        :param code: Status code of a BadStatusError
+        """
+        key = (name, code)
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+class StageProfile:
+    """
+    Profile hook of Fronius summing up the time spent in each stage
+    of the requests, see PROFILE_STAGES
+    Attributes:
+        seconds     Total wall clock seconds by (stage, endpoint name)
+        calls       Number of times a stage was run by (stage, endpoint name)
+    """
+
+    def __init__(self) -> None:
+        """
+        Constructor
+        """
+        self.seconds: Dict[Tuple[str, str], float] = {}
+        self.calls: Dict[Tuple[str, str], int] = {}
+
+    @contextmanager
+    def __call__(self, stage: str, endpoint: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            key = (stage, endpoint)
+            self.seconds[key] = self.seconds.get(key, 0.0) + (
+                time.perf_counter() - start
+            )
+            self.calls[key] = self.calls.get(key, 0) + 1
+
+    def by_stage(self) -> Dict[str, float]:
+        """
+        Total seconds by stage over all endpoints
+        """
+        seconds: Dict[str, float] = {}
+        for (stage, _), stage_seconds in self.seconds.items():
+            seconds[stage] = seconds.get(stage, 0.0) + stage_seconds
+        return seconds
+
+    def reset(self) -> None:
+        """
+        Forget all recorded stages, e.g. before the next poll
+        """
+        self.seconds.clear()
+        self.calls.clear()
+
+
+def _prometheus_label(value: Any) -> str:
+    return (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    )
+
+
+def prometheus_text(stats: Dict[str, Dict[str, EndpointStats]]) -> str:
+    """
+    Render the stats of Fronius devices in the Prometheus text exposition format
+    :param stats: EndpointStats by endpoint name by url of the device,
+        see Fronius.stats and FroniusFleet.stats
+    """
+    counters = (
+        ("requests", "Requests sent to the device"),
+        ("bytes_received", "Bytes of received response bodies"),
+        ("cache_hits", "Calls served from the cache or a pending request"),
+        ("unchanged_hits", "Responses skipped as unchanged"),
+    )
+    rows = [
+        (
+            'host="{}",endpoint="{}"'.format(
+                _prometheus_label(host), _prometheus_label(endpoint)
+            ),
+            endpoint_stats,
+        )
+        for host, by_endpoint in sorted(stats.items())
+        for endpoint, endpoint_stats in sorted(by_endpoint.items())
+    ]
+    lines = []
+    for name, description in counters:
+        lines.append("# HELP fronius_{}_total {}".format(name, description))
+        lines.append("# TYPE fronius_{}_total counter".format(name))
+        for labels, endpoint_stats in rows:
+            lines.append(
+                "fronius_{}_total{{{}}} {}".format(
+                    name, labels, getattr(endpoint_stats, name)
+                )
+            )
+    lines.append("# HELP fronius_errors_total Failed requests by error")
+    lines.append("# TYPE fronius_errors_total counter")
+    for labels, endpoint_stats in rows:
+        for (error, code), count in sorted(endpoint_stats.errors.items()):
+            error_labels = '{},error="{}"'.format(labels, error)
+            if code is not None:
+                error_labels += ',code="{}"'.format(code)
+            lines.append("fronius_errors_total{{{}}} {}".format(error_labels, count))
+    lines.append("# HELP fronius_request_stage_seconds Duration of request stages")
+    lines.append("# TYPE fronius_request_stage_seconds histogram")
+    for labels, endpoint_stats in rows:
+        for stage, histogram in endpoint_stats.latency.items():
+            stage_labels = '{},stage="{}"'.format(labels, stage)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets + (math.inf,), histogram.counts):
+                cumulative += count
+                lines.append(
+                    'fronius_request_stage_seconds_bucket{{{},le="{}"}} {}'.format(
+                        stage_labels,
+                        "+Inf" if bound == math.inf else repr(float(bound)),
+                        cumulative,
+                    )
+                )
+            lines.append(
+                "fronius_request_stage_seconds_sum{{{}}} {!r}".format(
+                    stage_labels, histogram.sum
+                )
+            )
+            lines.append(
+                "fronius_request_stage_seconds_count{{{}}} {}".format(
+                    stage_labels, histogram.count
+                )
+            )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,633 @@
+"""Field tables, records and schema of the data converted by Fronius."""
+
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Dict,
+    Final,
+    Iterable,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+)
+
+from .const import (
+    AMPERE,
+    DEGREE_CELSIUS,
+    HERTZ,
+    OHMPILOT_STATE_CODES,
+    PERCENT,
+    VOLT,
+    VOLTAMPERE,
+    VOLTAMPEREREACTIVE,
+    VOLTAMPEREREACTIVE_HOUR,
+    WATT,
+    WATT_HOUR,
+)
+
+
+class FieldMapping(NamedTuple):
+    """
+    Mapping of a value of a response to a field of the converted data
+    Attributes:
+        source      Key of the value in the response
+        target      Name of the converted field
+        unit        Unit of the converted field, fields without unit only
+                    hold a value
+        alias       Key of the value in responses of other devices,
+                    taking precedence over source if both are present
+        subkey      Key of the value within the object at source
+        convert     Conversion applied to the value
+        type        Type of the converted value
+    """
+
+    source: str
+    target: str
+    unit: Optional[str] = None
+    alias: Optional[str] = None
+    subkey: Optional[str] = None
+    convert: Optional[Callable[[Any], Any]] = None
+    type: Type[Any] = float
+
+
+def _compile_fields(
+    fields: Iterable[FieldMapping],
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build a converter for a table of fields, generated as straight-line code
+    testing each key once as loops over the table or over the keys of the
+    response are slower. Fields are converted in the order of the table.
+    """
+    namespace: Dict[str, Any] = {}
+    lines = ["def convert(data):", "    converted = {}"]
+    previous_key = None
+    for index, field in enumerate(fields):
+        if field.convert is not None:
+            namespace["convert_{}".format(index)] = field.convert
+        # an alias is tested after the source to take precedence
+        for key in (field.source, field.alias):
+            if key is None:
+                continue
+            value = "data[{!r}]".format(key)
+            if field.subkey is not None:
+                value += "[{!r}]".format(field.subkey)
+            if field.convert is not None:
+                value = "convert_{}({})".format(index, value)
+            if field.unit is None:
+                item = "{{'value': {}}}".format(value)
+            else:
+                item = "{{'value': {}, 'unit': {!r}}}".format(value, field.unit)
+            # fields of the same key share the test for the key
+            if key != previous_key:
+                lines.append("    if {!r} in data:".format(key))
+                previous_key = key
+            lines.append("        converted[{!r}] = {}".format(field.target, item))
+    lines.append("    return converted")
+    exec("\n".join(lines), namespace)
+    return namespace["convert"]  # type: ignore[no-any-return]
+
+
+# Fields of a meter, SMARTMETER_* and ACBRIDGE_* keys are reported by Gen24 devices
+METER_FIELDS: Final = (
+    FieldMapping(
+        "Current_AC_Phase_1",
+        "current_ac_phase_1",
+        AMPERE,
+        alias="ACBRIDGE_CURRENT_ACTIVE_MEAN_01_F32",
+    ),
+    FieldMapping(
+        "Current_AC_Phase_2",
+        "current_ac_phase_2",
+        AMPERE,
+        alias="ACBRIDGE_CURRENT_ACTIVE_MEAN_02_F32",
+    ),
+    FieldMapping(
+        "Current_AC_Phase_3",
+        "current_ac_phase_3",
+        AMPERE,
+        alias="ACBRIDGE_CURRENT_ACTIVE_MEAN_03_F32",
+    ),
+    FieldMapping(
+        "EnergyReactive_VArAC_Sum_Consumed",
+        "energy_reactive_ac_consumed",
+        VOLTAMPEREREACTIVE_HOUR,
+    ),
+    FieldMapping(
+        "EnergyReactive_VArAC_Sum_Produced",
+        "energy_reactive_ac_produced",
+        VOLTAMPEREREACTIVE_HOUR,
+    ),
+    FieldMapping("EnergyReal_WAC_Minus_Absolute", "energy_real_ac_minus", WATT_HOUR),
+    FieldMapping("EnergyReal_WAC_Plus_Absolute", "energy_real_ac_plus", WATT_HOUR),
+    FieldMapping(
+        "EnergyReal_WAC_Sum_Consumed",
+        "energy_real_consumed",
+        WATT_HOUR,
+        alias="SMARTMETER_ENERGYACTIVE_CONSUMED_SUM_F64",
+    ),
+    FieldMapping(
+        "EnergyReal_WAC_Sum_Produced",
+        "energy_real_produced",
+        WATT_HOUR,
+        alias="SMARTMETER_ENERGYACTIVE_PRODUCED_SUM_F64",
+    ),
+    FieldMapping("Frequency_Phase_Average", "frequency_phase_average", HERTZ),
+    FieldMapping("PowerApparent_S_Phase_1", "power_apparent_phase_1", VOLTAMPERE),
+    FieldMapping("PowerApparent_S_Phase_2", "power_apparent_phase_2", VOLTAMPERE),
+    FieldMapping("PowerApparent_S_Phase_3", "power_apparent_phase_3", VOLTAMPERE),
+    FieldMapping("PowerApparent_S_Sum", "power_apparent", VOLTAMPERE),
+    FieldMapping("PowerFactor_Phase_1", "power_factor_phase_1"),
+    FieldMapping("PowerFactor_Phase_2", "power_factor_phase_2"),
+    FieldMapping("PowerFactor_Phase_3", "power_factor_phase_3"),
+    FieldMapping("PowerFactor_Sum", "power_factor"),
+    FieldMapping(
+        "PowerReactive_Q_Phase_1", "power_reactive_phase_1", VOLTAMPEREREACTIVE
+    ),
+    FieldMapping(
+        "PowerReactive_Q_Phase_2", "power_reactive_phase_2", VOLTAMPEREREACTIVE
+    ),
+    FieldMapping(
+        "PowerReactive_Q_Phase_3", "power_reactive_phase_3", VOLTAMPEREREACTIVE
+    ),
+    FieldMapping("PowerReactive_Q_Sum", "power_reactive", VOLTAMPEREREACTIVE),
+    FieldMapping(
+        "PowerReal_P_Phase_1",
+        "power_real_phase_1",
+        WATT,
+        alias="SMARTMETER_POWERACTIVE_01_F64",
+    ),
+    FieldMapping(
+        "PowerReal_P_Phase_2",
+        "power_real_phase_2",
+        WATT,
+        alias="SMARTMETER_POWERACTIVE_02_F64",
+    ),
+    FieldMapping(
+        "PowerReal_P_Phase_3",
+        "power_real_phase_3",
+        WATT,
+        alias="SMARTMETER_POWERACTIVE_03_F64",
+    ),
+    FieldMapping("PowerReal_P_Sum", "power_real", WATT),
+    FieldMapping("Voltage_AC_Phase_1", "voltage_ac_phase_1", VOLT),
+    FieldMapping("Voltage_AC_Phase_2", "voltage_ac_phase_2", VOLT),
+    FieldMapping("Voltage_AC_Phase_3", "voltage_ac_phase_3", VOLT),
+    FieldMapping("Voltage_AC_PhaseToPhase_12", "voltage_ac_phase_to_phase_12", VOLT),
+    FieldMapping("Voltage_AC_PhaseToPhase_23", "voltage_ac_phase_to_phase_23", VOLT),
+    FieldMapping("Voltage_AC_PhaseToPhase_31", "voltage_ac_phase_to_phase_31", VOLT),
+    FieldMapping("Meter_Location_Current", "meter_location", type=int),
+    FieldMapping("Enable", "enable", type=int),
+    FieldMapping("Visible", "visible", type=int),
+    FieldMapping("Details", "manufacturer", subkey="Manufacturer", type=str),
+    FieldMapping("Details", "model", subkey="Model", type=str),
+    FieldMapping("Details", "serial", subkey="Serial", type=str),
+)
+
+# Fields shared by storage controllers and their modules
+_BATTERY_FIELDS: Final = (
+    FieldMapping("Capacity_Maximum", "capacity_maximum", "Ah"),
+    FieldMapping("DesignedCapacity", "capacity_designed", "Ah"),
+    FieldMapping("Current_DC", "current_dc", AMPERE),
+    FieldMapping("Voltage_DC", "voltage_dc", VOLT),
+    FieldMapping("Voltage_DC_Maximum_Cell", "voltage_dc_maximum_cell", VOLT),
+    FieldMapping("Voltage_DC_Minimum_Cell", "voltage_dc_minimum_cell", VOLT),
+    FieldMapping("StateOfCharge_Relative", "state_of_charge", PERCENT),
+    FieldMapping("Temperature_Cell", "temperature_cell", DEGREE_CELSIUS),
+)
+
+STORAGE_CONTROLLER_FIELDS: Final = _BATTERY_FIELDS + (
+    FieldMapping("Enable", "enable", type=int),
+    FieldMapping("Details", "manufacturer", subkey="Manufacturer", type=str),
+    FieldMapping("Details", "model", subkey="Model", type=str),
+    FieldMapping("Details", "serial", subkey="Serial", type=str),
+)
+
+STORAGE_MODULE_FIELDS: Final = _BATTERY_FIELDS + (
+    FieldMapping(
+        "Temperature_Cell_Maximum", "temperature_cell_maximum", DEGREE_CELSIUS
+    ),
+    FieldMapping(
+        "Temperature_Cell_Minimum", "temperature_cell_minimum", DEGREE_CELSIUS
+    ),
+    FieldMapping("CycleCount_BatteryCell", "cycle_count_cell", type=int),
+    FieldMapping("Status_BatteryCell", "status_cell", type=int),
+    FieldMapping("Enable", "enable", type=int),
+    FieldMapping("Details", "manufacturer", subkey="Manufacturer", type=str),
+    FieldMapping("Details", "model", subkey="Model", type=str),
+    FieldMapping("Details", "serial", subkey="Serial", type=str),
+)
+
+OHMPILOT_FIELDS: Final = (
+    FieldMapping("CodeOfError", "error_code", type=int),
+    FieldMapping("CodeOfState", "state_code", type=int),
+    FieldMapping(
+        "CodeOfState",
+        "state_message",
+        convert=lambda state_code: OHMPILOT_STATE_CODES.get(state_code, "Unknown"),
+        type=str,
+    ),
+    FieldMapping("Details", "hardware", subkey="Hardware", type=str),
+    FieldMapping("Details", "manufacturer", subkey="Manufacturer", type=str),
+    FieldMapping("Details", "model", subkey="Model", type=str),
+    FieldMapping("Details", "serial", subkey="Serial", type=str),
+    FieldMapping("Details", "software", subkey="Software", type=str),
+    FieldMapping("EnergyReal_WAC_Sum_Consumed", "energy_real_ac_consumed", WATT_HOUR),
+    FieldMapping("PowerReal_PAC_Sum", "power_real_ac", WATT),
+    FieldMapping("Temperature_Channel_1", "temperature_channel_1", DEGREE_CELSIUS),
+)
+
+# Fields of the site of the power flow
+POWER_FLOW_SITE_FIELDS: Final = (
+    FieldMapping("BackupMode", "backup_mode", type=bool),
+    FieldMapping("BatteryStandby", "battery_standby", type=bool),
+    FieldMapping("E_Day", "energy_day", WATT_HOUR),
+    FieldMapping("E_Total", "energy_total", WATT_HOUR),
+    FieldMapping("E_Year", "energy_year", WATT_HOUR),
+    FieldMapping("Meter_Location", "meter_location", type=str),
+    FieldMapping("Mode", "meter_mode", type=str),
+    FieldMapping("P_Akku", "power_battery", WATT),
+    FieldMapping("P_Grid", "power_grid", WATT),
+    FieldMapping("P_Load", "power_load", WATT),
+    FieldMapping("P_PV", "power_photovoltaics", WATT),
+    FieldMapping("rel_Autonomy", "relative_autonomy", PERCENT),
+    FieldMapping("rel_SelfConsumption", "relative_self_consumption", PERCENT),
+)
+
+# Fields of the logger info without the factors in local currency
+LOGGER_INFO_FIELDS: Final = (
+    FieldMapping("HWVersion", "hardware_version", type=str),
+    FieldMapping("SWVersion", "software_version", type=str),
+    FieldMapping("PlatformID", "hardware_platform", type=str),
+    FieldMapping("ProductID", "product_type", type=str),
+    FieldMapping("TimezoneLocation", "time_zone_location", type=str),
+    FieldMapping("TimezoneName", "time_zone", type=str),
+    FieldMapping("UTCOffset", "utc_offset", type=int),
+    FieldMapping("UniqueID", "unique_identifier", type=str),
+)
+
+
+def _field_units(fields: Iterable[FieldMapping]) -> Dict[str, Optional[str]]:
+    return {field.target: field.unit for field in fields}
+
+
+def _series_units(
+    name: str, unit: Optional[str], indices: Iterable[Any]
+) -> Dict[str, Optional[str]]:
+    return {"{}_{}".format(name, i): unit for i in indices}
+
+
+class FroniusRecord:
+    """
+    Compact converted data of a device with plain values as attributes,
+    the units of the fields are given once by UNITS.
+    Fields not reported by the device are unset, fields not known to the record
+    or reported with another unit are kept as converted in extra.
+    Attributes:
+        timestamp   Timestamp of the response
+        status      Status of the response header
+        extra       Further converted fields by name, None if there are none
+    """
+
+    __slots__ = ("timestamp", "status", "extra")
+    # unit of each field, None for fields without unit
+    UNITS: ClassVar[Dict[str, Optional[str]]] = {}
+    # fields holding records of another type by index
+    NESTED: ClassVar[Dict[str, Type["FroniusRecord"]]] = {}
+
+    def __init__(self, **fields: Any) -> None:
+        self.extra: Optional[Dict[str, Any]] = None
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FroniusRecord":
+        """
+        Convert data in the format of Fronius.current_* to a record
+        """
+        record = cls()
+        for name, item in data.items():
+            if name == "status":
+                record.status = item
+            elif name == "timestamp":
+                record.timestamp = item["value"]
+            elif name in cls.NESTED:
+                nested = cls.NESTED[name]
+                setattr(
+                    record, name, {i: nested.from_dict(d) for i, d in item.items()}
+                )
+            elif name in cls.UNITS and item == cls._item(
+                item.get("value"), cls.UNITS[name]
+            ):
+                setattr(record, name, item["value"])
+            else:
+                if record.extra is None:
+                    record.extra = {}
+                record.extra[name] = item
+        return record
+
+    @staticmethod
+    def _item(value: Any, unit: Optional[str]) -> Dict[str, Any]:
+        if unit is None:
+            return {"value": value}
+        return {"value": value, "unit": unit}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert the record back to the format of Fronius.current_*
+        """
+        data: Dict[str, Any] = {}
+        if hasattr(self, "timestamp"):
+            data["timestamp"] = {"value": self.timestamp}
+        if hasattr(self, "status"):
+            data["status"] = self.status
+        for name, unit in self.UNITS.items():
+            if hasattr(self, name):
+                data[name] = self._item(getattr(self, name), unit)
+        for name in self.NESTED:
+            if hasattr(self, name):
+                data[name] = {i: r.to_dict() for i, r in getattr(self, name).items()}
+        if self.extra is not None:
+            data.update(self.extra)
+        return data
+
+    def replace(self, **fields: Any) -> "FroniusRecord":
+        """
+        Copy the record with the given fields set
+        """
+        record = type(self)()
+        for cls in type(self).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(self, name):
+                    setattr(record, name, getattr(self, name))
+        for name, value in fields.items():
+            setattr(record, name, value)
+        return record
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        assert isinstance(other, FroniusRecord)
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return "{}({})".format(
+            type(self).__name__,
+            ", ".join(
+                "{}={!r}".format(name, getattr(self, name))
+                for name in ("timestamp", *self.UNITS, *self.NESTED)
+                if hasattr(self, name)
+            ),
+        )
+
+
+class MeterData(FroniusRecord):
+    """Data of a meter."""
+
+    UNITS: ClassVar[Dict[str, Optional[str]]] = _field_units(METER_FIELDS)
+    __slots__ = tuple(UNITS)
+
+
+class StorageModule(FroniusRecord):
+    """Data of a module of a storage."""
+
+    UNITS: ClassVar[Dict[str, Optional[str]]] = _field_units(STORAGE_MODULE_FIELDS)
+    __slots__ = tuple(UNITS)
+
+
+class StorageController(FroniusRecord):
+    """Data of a storage controller with its modules by index."""
+
+    UNITS: ClassVar[Dict[str, Optional[str]]] = _field_units(
+        STORAGE_CONTROLLER_FIELDS
+    )
+    NESTED: ClassVar[Dict[str, Type[FroniusRecord]]] = {"modules": StorageModule}
+    __slots__ = (*UNITS, "modules")
+
+
+class InverterData(FroniusRecord):
+    """Data of an inverter, including three phase data."""
+
+    UNITS: ClassVar[Dict[str, Optional[str]]] = {
+        "energy_day": WATT_HOUR,
+        "energy_total": WATT_HOUR,
+        "energy_year": WATT_HOUR,
+        "frequency_ac": HERTZ,
+        "current_ac": AMPERE,
+        "current_dc": AMPERE,
+        **_series_units("current_dc", AMPERE, range(2, 10)),
+        "power_ac": WATT,
+        "voltage_ac": VOLT,
+        "voltage_dc": VOLT,
+        **_series_units("voltage_dc", VOLT, range(2, 10)),
+        "inverter_state": None,
+        "error_code": None,
+        "status_code": None,
+        "led_state": None,
+        "led_color": None,
+        **_series_units("current_ac_phase", AMPERE, range(1, 4)),
+        **_series_units("voltage_ac_phase", VOLT, range(1, 4)),
+    }
+    __slots__ = tuple(UNITS)
+
+
+class PowerFlow(FroniusRecord):
+    """Power flow of a site."""
+
+    UNITS: ClassVar[Dict[str, Optional[str]]] = {
+        "battery_mode": None,
+        "state_of_charge": PERCENT,
+        **_field_units(POWER_FLOW_SITE_FIELDS),
+    }
+    __slots__ = tuple(UNITS)
+
+
+# Record types of the endpoints returning data of a single device
+RECORD_TYPES: Final[Dict[str, Type[FroniusRecord]]] = {
+    "power_flow": PowerFlow,
+    "device_meter": MeterData,
+    "device_storage": StorageController,
+    "device_inverter": InverterData,
+    "device_inverter_3p": InverterData,
+}
+
+# Collection of records by device id in the data of system scope endpoints
+SYSTEM_RECORD_TYPES: Final[Dict[str, Tuple[str, Type[FroniusRecord]]]] = {
+    "system_meter": ("meters", MeterData),
+    "system_storage": ("storages", StorageController),
+    "system_inverter": ("inverters", InverterData),
+}
+
+
+def as_records(endpoint: str, data: Dict[str, Any]) -> Any:
+    """
+    Convert data of an endpoint as returned by Fronius.current_* to records,
+    data of system scope endpoints stays a dict holding a record per device
+    :param endpoint: Name of the endpoint as in ENDPOINTS
+    """
+    if endpoint in RECORD_TYPES:
+        return RECORD_TYPES[endpoint].from_dict(data)
+    if endpoint in SYSTEM_RECORD_TYPES:
+        collection, record_type = SYSTEM_RECORD_TYPES[endpoint]
+        data = dict(data)
+        data[collection] = {
+            i: record_type.from_dict(d) for i, d in data[collection].items()
+        }
+    return data
+
+
+def as_dict(data: Any) -> Dict[str, Any]:
+    """
+    Convert records back to the format of Fronius.current_*
+    :param data: A record or data of a system scope endpoint holding records
+    """
+    if isinstance(data, FroniusRecord):
+        return data.to_dict()
+    data = dict(data)
+    for collection, _ in SYSTEM_RECORD_TYPES.values():
+        records = data.get(collection)
+        if isinstance(records, dict):
+            data[collection] = {i: as_dict(record) for i, record in records.items()}
+    return data
+
+
+class FieldSchema(NamedTuple):
+    """
+    Description of a converted field
+    Attributes:
+        unit        Unit of the value, None if the field has no unit
+                    or the unit is reported by the device
+        type        Type of the value
+        fields      Fields of the items of a collection by name
+    """
+
+    unit: Optional[str]
+    type: Type[Any]
+    fields: Optional[Dict[str, "FieldSchema"]] = None
+
+
+def _table_schema(fields: Iterable[FieldMapping]) -> Dict[str, FieldSchema]:
+    return {field.target: FieldSchema(field.unit, field.type) for field in fields}
+
+
+_HEADER_SCHEMA: Final = {
+    "timestamp": FieldSchema(None, str),
+    "status": FieldSchema(None, dict),
+}
+
+# units of inverters are reported by the device, these are the usual ones
+_INVERTER_SCHEMA: Final = {
+    name: FieldSchema(unit, float if unit is not None else int)
+    for name, unit in InverterData.UNITS.items()
+}
+_INVERTER_SCHEMA["inverter_state"] = FieldSchema(None, str)
+
+_STORAGE_SCHEMA: Final = {
+    **_table_schema(STORAGE_CONTROLLER_FIELDS),
+    "modules": FieldSchema(None, dict, _table_schema(STORAGE_MODULE_FIELDS)),
+}
+
+# Fields of the converted data by endpoint name as in ENDPOINTS
+SCHEMA: Final[Dict[str, Dict[str, FieldSchema]]] = {
+    endpoint: {**_HEADER_SCHEMA, **fields}
+    for endpoint, fields in {
+        "active_device_info": {
+            device_class: FieldSchema(None, list)
+            for device_class in (
+                "inverters",
+                "meters",
+                "ohmpilots",
+                "sensor_cards",
+                "storages",
+                "string_controls",
+            )
+        },
+        "inverter_info": {
+            "inverters": FieldSchema(
+                None,
+                list,
+                {
+                    "device_id": FieldSchema(None, str),
+                    "device_type": FieldSchema(None, int),
+                    "pv_power": FieldSchema(WATT, float),
+                    "status_code": FieldSchema(None, int),
+                    "unique_id": FieldSchema(None, str),
+                    "custom_name": FieldSchema(None, str),
+                    "error_code": FieldSchema(None, int),
+                    "show": FieldSchema(None, int),
+                },
+            )
+        },
+        "logger_info": {
+            # units in the currency configured on the device
+            "co2_factor": FieldSchema(None, float),
+            "cash_factor": FieldSchema(None, float),
+            "delivery_factor": FieldSchema(None, float),
+            **_table_schema(LOGGER_INFO_FIELDS),
+        },
+        "power_flow": {
+            "battery_mode": FieldSchema(None, str),
+            "state_of_charge": FieldSchema(PERCENT, float),
+            **_table_schema(POWER_FLOW_SITE_FIELDS),
+        },
+        "system_meter": {
+            "meters": FieldSchema(None, dict, _table_schema(METER_FIELDS))
+        },
+        "system_inverter": {
+            "energy_day": FieldSchema(WATT_HOUR, float),
+            "energy_total": FieldSchema(WATT_HOUR, float),
+            "energy_year": FieldSchema(WATT_HOUR, float),
+            "power_ac": FieldSchema(WATT, float),
+            "inverters": FieldSchema(None, dict, _INVERTER_SCHEMA),
+        },
+        "system_ohmpilot": {
+            "ohmpilots": FieldSchema(None, dict, _table_schema(OHMPILOT_FIELDS))
+        },
+        "system_storage": {"storages": FieldSchema(None, dict, _STORAGE_SCHEMA)},
+        "system_led": {
+            led: FieldSchema(None, dict)
+            for led in ("power_led", "solar_net_led", "solar_web_led", "wlan_led")
+        },
+        "device_meter": _table_schema(METER_FIELDS),
+        "device_storage": _STORAGE_SCHEMA,
+        "device_inverter": _INVERTER_SCHEMA,
+        "device_inverter_3p": _INVERTER_SCHEMA,
+    }.items()
+}
+
+
+def as_values(endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert data of an endpoint as returned by Fronius.current_* to a map of
+    values by field, dropping the units given by SCHEMA.
+    Fields with another unit than in SCHEMA keep their value and unit.
+    :param endpoint: Name of the endpoint as in ENDPOINTS
+    """
+    return _values(data, SCHEMA[endpoint])
+
+
+def _values(data: Dict[Any, Any], schema: Dict[str, FieldSchema]) -> Dict[Any, Any]:
+    values = {}
+    for name, item in data.items():
+        field = schema.get(name)
+        if field is not None and field.fields is not None:
+            if isinstance(item, list):
+                values[name] = [_values(i, field.fields) for i in item]
+            else:
+                values[name] = {i: _values(d, field.fields) for i, d in item.items()}
+        elif (
+            isinstance(item, dict)
+            and "value" in item
+            and len(item) == 1 + ("unit" in item)
+            and item.get("unit") == (field.unit if field is not None else None)
+        ):
+            values[name] = item["value"]
+        else:
+            values[name] = item
+    return values
+
+
+def _value(item: Any) -> Any:
+    """The value of a converted field in any output format"""
+    return item.get("value") if isinstance(item, dict) else item
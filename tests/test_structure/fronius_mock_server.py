@@ -1,7 +1,8 @@
 import os
+import time
 import urllib.parse
 from http.server import BaseHTTPRequestHandler, SimpleHTTPRequestHandler, HTTPServer
-from typing import Tuple, Callable
+from typing import List, Optional, Tuple, Callable
 
 try:
     from http import HTTPStatus
@@ -23,11 +24,30 @@ class FroniusServer(HTTPServer):
     ):
         super().__init__(server_address, RequestHandlerClass)
         self.api_version = api_version
+        self.request_paths: List[str] = []
+        # seconds to wait before answering a request
+        self.response_delay = 0.0
+        # charset declared in the content type of the responses
+        self.charset: Optional[str] = None
 
 
 class FroniusRequestHandler(SimpleHTTPRequestHandler):
     server: FroniusServer
 
+    def do_GET(self):
+        """Record requested paths to allow counting requests in tests"""
+        self.server.request_paths.append(self.path)
+        if self.server.response_delay:
+            time.sleep(self.server.response_delay)
+        super().do_GET()
+
+    def guess_type(self, path):
+        """Declare the charset of the server in the content type"""
+        content_type = super().guess_type(path)
+        if self.server.charset is not None:
+            content_type = "{}; charset={}".format(content_type, self.server.charset)
+        return content_type
+
     def translate_path(self, path):
         """Translate a /-separated PATH to the local filename syntax.
 
@@ -204,6 +204,24 @@ class FroniusWebTestV0(AsyncTestCaseSetup):
         res = await self.fronius.inverter_info()
         self.assertDictEqual(res, GET_INVERTER_INFO)
 
+    async def test_fronius_fetch_auto_plan(self):
+        # active device info is not available, the given devices are used
+        res = await self.fronius.fetch(
+            active_device_info=False,
+            inverter_info=False,
+            logger_info=False,
+            device_meter=[],
+            device_storage=[],
+            plan="auto",
+        )
+        self.assertEqual(
+            res,
+            [
+                GET_INVERTER_REALTIME_DATA_SYSTEM,
+                GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE,
+            ],
+        )
+
     async def test_fronius_get_no_data(self):
         # Storage data for device 0 is not provided ATM
         # TODO someone add some storage data for a device 1?
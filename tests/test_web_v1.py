@@ -3,14 +3,23 @@
 
 # general requirements
 import unittest
+import unittest.mock
+import contextlib
+import json
+import socket
 
 
 from .util import AsyncTestCaseSetup, _get_unused_port, ADDRESS
 from .test_structure.server_control import Server
-from .test_structure.fronius_mock_server import FroniusRequestHandler, FroniusServer
+from .test_structure.fronius_mock_server import (
+    FroniusRequestHandler,
+    FroniusServer,
+    SERVER_DIR,
+)
 from http.server import SimpleHTTPRequestHandler
 
 # For the server in this case
+import asyncio
 import time
 
 # For the tests
@@ -93,6 +102,10 @@ class NoFroniusWebTest(AsyncTestCaseSetup):
             pass
         finally:
             await self.session.close()
+        # the fallback to V0 after an error page is not remembered for the url
+        self.assertEqual(self.fronius.api_version, pyfronius.API_VERSION.V0)
+        fronius = pyfronius.Fronius(self.session, self.url)
+        self.assertEqual(fronius.api_version, pyfronius.API_VERSION.AUTO)
 
 
 class FroniusWebDetectVersionV1(AsyncTestCaseSetup):
@@ -140,6 +153,21 @@ class FroniusWebDetectVersionV1(AsyncTestCaseSetup):
         self.assertDictEqual(res, GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE)
         self.assertEqual(self.fronius.api_version, self.api_version)
 
+    async def test_fronius_discover_api_version_once(self):
+        pyfronius.Fronius.clear_api_version_cache()
+        await self.fronius.fetch()
+        self.assertEqual(
+            self.server.request_paths.count("/solar_api/GetAPIVersion.cgi"), 1
+        )
+        # new instances for the same device reuse the discovered version
+        fronius = pyfronius.Fronius(self.session, self.url)
+        self.assertEqual(fronius.api_version, self.api_version)
+        await fronius.current_power_flow()
+        self.assertEqual(
+            self.server.request_paths.count("/solar_api/GetAPIVersion.cgi"), 1
+        )
+        await self.session.close()
+
 
 class FroniusWebTestV1(AsyncTestCaseSetup):
     server = None
@@ -228,6 +256,948 @@ class FroniusWebTestV1(AsyncTestCaseSetup):
         res = await self.fronius.current_system_storage_data()
         self.assertDictEqual(res, GET_STORAGE_REALTIME_DATA_SYSTEM)
 
+    async def test_fronius_cache(self):
+        fronius = pyfronius.Fronius(
+            self.session,
+            self.url,
+            self.api_version,
+            cache_ttl=pyfronius.DEFAULT_CACHE_TTL,
+        )
+        path = "/solar_api/v1/GetLoggerInfo.cgi"
+        self.assertDictEqual(await fronius.current_logger_info(), GET_LOGGER_INFO)
+        self.assertDictEqual(await fronius.current_logger_info(), GET_LOGGER_INFO)
+        self.assertEqual(self.server.request_paths.count(path), 1)
+        fronius.invalidate_cache("logger_info")
+        self.assertDictEqual(await fronius.current_logger_info(), GET_LOGGER_INFO)
+        self.assertEqual(self.server.request_paths.count(path), 2)
+        # endpoints without lifetime are not cached
+        await fronius.current_power_flow()
+        await fronius.current_power_flow()
+        self.assertEqual(
+            self.server.request_paths.count(
+                "/solar_api/v1/GetPowerFlowRealtimeData.fcgi"
+            ),
+            2,
+        )
+
+    async def test_fronius_coalesce_requests(self):
+        path = "/solar_api/v1/GetPowerFlowRealtimeData.fcgi"
+        res = await asyncio.gather(
+            self.fronius.current_power_flow(), self.fronius.current_power_flow()
+        )
+        self.assertEqual(res, [GET_POWER_FLOW_REALTIME_DATA] * 2)
+        self.assertEqual(self.server.request_paths.count(path), 1)
+        await self.fronius.current_power_flow()
+        self.assertEqual(self.server.request_paths.count(path), 2)
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, coalesce_window=60
+        )
+        await fronius.current_power_flow()
+        self.assertDictEqual(
+            await fronius.current_power_flow(), GET_POWER_FLOW_REALTIME_DATA
+        )
+        self.assertEqual(self.server.request_paths.count(path), 3)
+
+    async def test_fronius_skip_unchanged(self):
+        path = "/solar_api/v1/GetPowerFlowRealtimeData.fcgi"
+        for skip_unchanged in ("body", "timestamp"):
+            fronius = pyfronius.Fronius(
+                self.session, self.url, self.api_version, skip_unchanged=skip_unchanged
+            )
+            first = await fronius.current_power_flow()
+            self.assertDictEqual(first, GET_POWER_FLOW_REALTIME_DATA)
+            self.assertIs(await fronius.current_power_flow(), first)
+            self.assertEqual(fronius.unchanged_hits, 1)
+            # other conversions of the same response are not reused
+            await fronius.current_power_flow(ext_cb_conversion=lambda data: {})
+            self.assertEqual(fronius.unchanged_hits, 1)
+        self.assertEqual(self.server.request_paths.count(path), 6)
+        with self.assertRaises(ValueError):
+            pyfronius.Fronius(self.session, self.url, skip_unchanged="hash")
+
+    async def test_fronius_tracer(self):
+        tracer = pyfronius.PayloadTracer(
+            sample_rates={"system_meter": 0}, max_size=100, max_entries=2
+        )
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, tracer=tracer
+        )
+        await fronius.current_power_flow()
+        await fronius.current_system_meter_data()
+        await fronius.current_led_data()
+        await fronius.current_logger_info()
+        self.assertEqual(tracer.captured, 3)
+        self.assertEqual(
+            [payload.endpoint for payload in tracer.entries],
+            ["system_led", "logger_info"],
+        )
+        payload = tracer.entries[-1]
+        self.assertTrue(payload.url.endswith("/GetLoggerInfo.cgi"))
+        self.assertEqual(len(payload.body), 100)
+        self.assertGreater(payload.size, 100)
+
+    async def test_fronius_stats(self):
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, cache_ttl={"power_flow": 60}
+        )
+        await fronius.current_power_flow()
+        await fronius.current_power_flow()
+        with self.assertRaises(pyfronius.NotSupportedError):
+            await fronius.current_storage_data("1")
+        stats = fronius.stats()
+        self.assertEqual(set(stats), {"power_flow", "device_storage"})
+        power_flow = stats["power_flow"]
+        self.assertEqual(power_flow.requests, 1)
+        self.assertEqual(power_flow.cache_hits, 1)
+        self.assertGreater(power_flow.bytes_received, 0)
+        self.assertEqual(power_flow.errors, {})
+        for stage in pyfronius.REQUEST_STAGES:
+            self.assertEqual(power_flow.latency[stage].count, 1)
+            self.assertEqual(sum(power_flow.latency[stage].counts), 1)
+        self.assertEqual(
+            stats["device_storage"].errors, {("NotSupportedError", None): 1}
+        )
+        self.assertEqual(stats["device_storage"].latency["convert"].count, 0)
+
+        text = fronius.prometheus_metrics()
+        labels = 'host="{}",endpoint="power_flow"'.format(self.url)
+        self.assertIn("fronius_requests_total{{{}}} 1\n".format(labels), text)
+        self.assertIn("fronius_cache_hits_total{{{}}} 1\n".format(labels), text)
+        self.assertIn(
+            'fronius_errors_total{{host="{}",endpoint="device_storage",'
+            'error="NotSupportedError"}} 1\n'.format(self.url),
+            text,
+        )
+        self.assertIn(
+            'fronius_request_stage_seconds_bucket{{{},stage="network",le="+Inf"}} 1\n'
+            .format(labels),
+            text,
+        )
+        self.assertEqual(text.count("# TYPE"), 6)
+
+    async def test_fronius_profile_hook(self):
+        profile = pyfronius.StageProfile()
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, profile_hook=profile
+        )
+        await fronius.current_power_flow()
+        await fronius.current_system_meter_data()
+        self.assertEqual(
+            set(profile.calls),
+            {
+                (stage, endpoint)
+                for stage in pyfronius.PROFILE_STAGES
+                for endpoint in ("power_flow", "system_meter")
+            },
+        )
+        self.assertEqual(set(profile.calls.values()), {1})
+        self.assertEqual(set(profile.by_stage()), set(pyfronius.PROFILE_STAGES))
+        # stages are entered in order until the failing one, here decoding 404
+        stages = []
+
+        @contextlib.contextmanager
+        def span(stage, endpoint):
+            stages.append((stage, endpoint))
+            yield
+
+        fronius.profile_hook = span
+        with self.assertRaises(pyfronius.NotSupportedError):
+            await fronius.current_storage_data("1")
+        self.assertEqual(
+            stages,
+            [
+                ("url", "device_storage"),
+                ("fetch", "device_storage"),
+                ("decode", "device_storage"),
+            ],
+        )
+        profile.reset()
+        self.assertEqual(profile.seconds, {})
+
+    async def test_fronius_json_codec(self):
+        codecs = [pyfronius.json_codec("json"), pyfronius.DEFAULT_JSON_CODEC]
+        for name in ("orjson", "msgspec"):
+            try:
+                codecs.append(pyfronius.json_codec(name))
+            except ImportError:
+                pass
+        expected = json.loads(json.dumps(GET_STORAGE_REALTIME_DATA_SYSTEM))
+        for codec in codecs:
+            fronius = pyfronius.Fronius(
+                self.session, self.url, self.api_version, json_codec=codec
+            )
+            res = await fronius.current_system_storage_data()
+            self.assertDictEqual(res, GET_STORAGE_REALTIME_DATA_SYSTEM)
+            # storage modules are keyed by int
+            self.assertEqual(json.loads(fronius.dumps(res)), expected)
+            self.assertEqual(json.loads(fronius.dumps(res, indent=True)), expected)
+            fronius.output_format = "records"
+            res = await fronius.current_storage_data()
+            self.assertEqual(
+                json.loads(fronius.dumps(res)),
+                json.loads(json.dumps(GET_STORAGE_REALTIME_DATA_SCOPE_DEVICE)),
+            )
+            with self.assertRaises(pyfronius.InvalidAnswerError):
+                pyfronius.Fronius._decode_json(b"{'Body'", self.url, codec)
+        with self.assertRaises(ValueError):
+            pyfronius.json_codec("ujson")
+
+    async def test_fronius_limit_requests(self):
+        fronius = pyfronius.Fronius(
+            self.session,
+            self.url,
+            self.api_version,
+            max_in_flight=1,
+            min_request_interval=0.05,
+        )
+        res = await fronius.fetch(
+            active_device_info=True,
+            inverter_info=True,
+            logger_info=True,
+            power_flow=True,
+            system_meter=False,
+            system_inverter=False,
+            system_ohmpilot=False,
+            system_storage=False,
+            device_meter=[],
+            device_storage=[],
+            device_inverter=[],
+        )
+        self.assertEqual(len(res), 4)
+        self.assertEqual(fronius.limiter.requests, 4)
+        self.assertEqual(fronius.limiter.queued, 3)
+        self.assertGreaterEqual(fronius.limiter.queue_time, 0.05 * 6)
+
+    async def test_fronius_circuit_breaker(self):
+        fronius = pyfronius.Fronius(
+            self.session,
+            "http://{}:{}".format(ADDRESS, _get_unused_port()),
+            self.api_version,
+            breaker_threshold=1,
+            breaker_reset_timeout=0.05,
+        )
+        with self.assertRaises(pyfronius.FroniusConnectionError):
+            await fronius.current_power_flow()
+        self.assertEqual(fronius.circuit_breaker.state, pyfronius.CIRCUIT_STATE.OPEN)
+        with self.assertRaises(pyfronius.CircuitOpenError):
+            await fronius.current_power_flow()
+        # a successful probe closes the breaker again
+        fronius.url = self.url
+        await asyncio.sleep(0.05)
+        res = await fronius.current_power_flow()
+        self.assertDictEqual(res, GET_POWER_FLOW_REALTIME_DATA)
+        self.assertEqual(
+            fronius.circuit_breaker.state, pyfronius.CIRCUIT_STATE.CLOSED
+        )
+        self.assertEqual(
+            fronius.circuit_breaker.transitions,
+            {
+                (pyfronius.CIRCUIT_STATE.CLOSED, pyfronius.CIRCUIT_STATE.OPEN): 1,
+                (
+                    pyfronius.CIRCUIT_STATE.OPEN,
+                    pyfronius.CIRCUIT_STATE.HALF_OPEN,
+                ): 1,
+                (
+                    pyfronius.CIRCUIT_STATE.HALF_OPEN,
+                    pyfronius.CIRCUIT_STATE.CLOSED,
+                ): 1,
+            },
+        )
+
+    async def test_fronius_circuit_breaker_concurrent(self):
+        # a dead host accepting connections without ever answering
+        with socket.socket() as dead:
+            dead.bind((ADDRESS, 0))
+            dead.listen()
+            fronius = pyfronius.Fronius(
+                self.session,
+                "http://{}:{}".format(ADDRESS, dead.getsockname()[1]),
+                self.api_version,
+                # only the power flow times out, the others wait for the session
+                timeouts={"power_flow": 0.2},
+                breaker_threshold=1,
+            )
+            start = time.monotonic()
+            res = await asyncio.gather(
+                fronius.current_power_flow(),
+                fronius.current_system_meter_data(),
+                fronius.current_system_inverter_data(),
+                fronius.inverter_info(),
+                return_exceptions=True,
+            )
+            elapsed = time.monotonic() - start
+        self.assertIs(type(res[0]), pyfronius.FroniusConnectionError)
+        for err in res[1:]:
+            self.assertIsInstance(err, pyfronius.CircuitOpenError)
+        # pending requests are aborted once the breaker opens
+        self.assertLess(elapsed, 2)
+        self.assertEqual(fronius.circuit_breaker.state, pyfronius.CIRCUIT_STATE.OPEN)
+
+    async def test_fronius_retry(self):
+        fronius = pyfronius.Fronius(
+            self.session,
+            "http://{}:{}".format(ADDRESS, _get_unused_port()),
+            self.api_version,
+            timeouts={"power_flow": 1},
+            retries=2,
+            retry_backoff=0.01,
+        )
+        with self.assertRaises(pyfronius.FroniusConnectionError):
+            await fronius.current_power_flow()
+        self.assertEqual(fronius.limiter.requests, 3)
+        # not supported endpoints are not retried
+        fronius.url = self.url
+        with self.assertRaises(pyfronius.NotSupportedError):
+            await fronius.current_storage_data("1")
+        self.assertEqual(fronius.limiter.requests, 4)
+        res = await fronius.current_power_flow()
+        self.assertDictEqual(res, GET_POWER_FLOW_REALTIME_DATA)
+        self.assertEqual(fronius.limiter.requests, 5)
+        # transient status codes like LNRequestTimeout (8) are retried
+        with self.assertRaises(pyfronius.BadStatusError) as ctx:
+            await fronius.current_meter_data("8")
+        self.assertEqual(ctx.exception.code, 8)
+        self.assertEqual(fronius.limiter.requests, 8)
+        meter_paths = [
+            path for path in self.server.request_paths if "DeviceId=8" in path
+        ]
+        self.assertEqual(len(meter_paths), 3)
+
+    async def test_fronius_fetch_deadline(self):
+        # requests are started every 0.2 seconds
+        fronius = pyfronius.Fronius(
+            self.session,
+            self.url,
+            self.api_version,
+            max_in_flight=1,
+            min_request_interval=0.2,
+        )
+        res = await fronius.fetch(
+            active_device_info=False,
+            inverter_info=False,
+            logger_info=True,
+            power_flow=True,
+            system_meter=True,
+            system_inverter=True,
+            system_ohmpilot=False,
+            system_storage=False,
+            device_meter=[],
+            device_storage=["1"],
+            device_inverter=[],
+            deadline=0.3,
+        )
+        self.assertEqual(res, [GET_LOGGER_INFO, GET_POWER_FLOW_REALTIME_DATA])
+        self.assertEqual(
+            res.missed,
+            [
+                ("system_meter", None),
+                ("system_inverter", None),
+                ("device_storage", "1"),
+            ],
+        )
+        self.assertEqual(res.failed, [])
+
+    async def test_fronius_fetch_deadline_cancels_requests(self):
+        self.server.response_delay = 1
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, max_in_flight=1
+        )
+        start = time.monotonic()
+        res = await fronius.fetch(
+            active_device_info=False,
+            inverter_info=False,
+            logger_info=True,
+            power_flow=True,
+            system_meter=False,
+            system_inverter=False,
+            system_ohmpilot=False,
+            system_storage=False,
+            device_meter=[],
+            device_storage=[],
+            device_inverter=[],
+            deadline=0.2,
+        )
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(res.missed, [("logger_info", None), ("power_flow", None)])
+        # the requests are cancelled, including the one waiting for its slot
+        self.assertEqual(fronius._pending, {})
+        self.assertEqual(fronius._waiters, {})
+        await asyncio.sleep(1.2)
+        self.assertEqual(len(self.server.request_paths), 1)
+        self.server.response_delay = 0
+
+    async def test_fronius_fetch_iter(self):
+        res = {}
+        async for name, result in self.fronius.fetch_iter(
+            active_device_info=False,
+            inverter_info=False,
+            logger_info=False,
+            power_flow=True,
+            system_meter=False,
+            system_inverter=False,
+            system_ohmpilot=False,
+            system_storage=False,
+            device_meter=["0"],
+            device_storage=["1"],
+            device_inverter=[],
+        ):
+            res[name] = result
+        self.assertEqual(
+            set(res),
+            {("power_flow", None), ("device_meter", "0"), ("device_storage", "1")},
+        )
+        self.assertDictEqual(res["power_flow", None], GET_POWER_FLOW_REALTIME_DATA)
+        self.assertDictEqual(
+            res["device_meter", "0"], GET_METER_REALTIME_DATA_SCOPE_DEVICE
+        )
+        self.assertIsInstance(res["device_storage", "1"], pyfronius.NotSupportedError)
+
+    async def test_fronius_poll(self):
+        polls = self.fronius.poll({"power_flow": 0.05, ("device_meter", "0"): 0.2})
+        snapshots = []
+        async for snapshot in polls:
+            snapshots.append(snapshot)
+            if len(snapshots) == 4:
+                break
+        await polls.aclose()
+        self.assertEqual(
+            snapshots[0],
+            {
+                ("power_flow", None): GET_POWER_FLOW_REALTIME_DATA,
+                ("device_meter", "0"): GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+            },
+        )
+        for snapshot in snapshots[1:]:
+            self.assertEqual(
+                snapshot, {("power_flow", None): GET_POWER_FLOW_REALTIME_DATA}
+            )
+        with self.assertRaises(ValueError):
+            await self.fronius.poll({"device_meter": 1}).__anext__()
+
+    async def test_fronius_poll_slow_endpoint(self):
+        endpoint_data = self.fronius._endpoint_data
+
+        async def slow_inverter_info(endpoint, device=None, fields=None):
+            if endpoint == "inverter_info":
+                await asyncio.sleep(1)
+            return await endpoint_data(endpoint, device, fields)
+
+        start = time.monotonic()
+        polled = []
+        with unittest.mock.patch.object(
+            self.fronius, "_endpoint_data", slow_inverter_info
+        ):
+            polls = self.fronius.poll({"power_flow": 0.1, "inverter_info": 10})
+            async for snapshot in polls:
+                polled.append((time.monotonic() - start, list(snapshot)))
+                if ("inverter_info", None) in snapshot:
+                    break
+            await polls.aclose()
+        # the power flow is not held back by the slow inverter info
+        self.assertLess(polled[0][0], 0.2)
+        self.assertEqual(polled[0][1], [("power_flow", None)])
+        self.assertGreaterEqual(len(polled), 8)
+        self.assertGreater(polled[-1][0], 1)
+        self.assertIn(("inverter_info", None), polled[-1][1])
+
+    async def test_fronius_poll_idle_inverters(self):
+        # the inverter reports startup state at night
+        polls = self.fronius.poll(
+            {"power_flow": 0.05, ("device_inverter", "1"): 0.05}, idle_factor=100
+        )
+        snapshots = []
+        async for snapshot in polls:
+            snapshots.append(snapshot)
+            if len(snapshots) == 3:
+                break
+        await polls.aclose()
+        self.assertIn(("device_inverter", "1"), snapshots[0])
+        for snapshot in snapshots[1:]:
+            self.assertEqual(list(snapshot), [("power_flow", None)])
+
+    def test_fronius_inverters_idle(self):
+        producing = dict(
+            GET_POWER_FLOW_REALTIME_DATA, power_photovoltaics={"value": 42}
+        )
+        snapshot = {("device_inverter", "1"): GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE}
+        self.assertTrue(pyfronius.Fronius._inverters_idle(snapshot, False))
+        snapshot[("power_flow", None)] = producing
+        self.assertFalse(pyfronius.Fronius._inverters_idle(snapshot, True))
+        # responses without state keep the previous state
+        snapshot = {("device_inverter_3p", "1"): {}}
+        self.assertTrue(pyfronius.Fronius._inverters_idle(snapshot, True))
+        self.assertFalse(pyfronius.Fronius._inverters_idle(snapshot, False))
+
+    async def test_fronius_snapshot_store(self):
+        path = "/solar_api/v1/GetPowerFlowRealtimeData.fcgi"
+        async with pyfronius.FroniusSnapshotStore(
+            self.fronius, max_age={"power_flow": 0.1}
+        ) as store:
+            entries = await asyncio.gather(
+                *(store.get("power_flow") for _ in range(10))
+            )
+            self.assertEqual(self.server.request_paths.count(path), 1)
+            for entry in entries:
+                self.assertDictEqual(entry.data, GET_POWER_FLOW_REALTIME_DATA)
+                self.assertIsNone(entry.error)
+            await asyncio.sleep(0.35)
+            # refreshed in the background, reads do not request the device
+            requests = self.server.request_paths.count(path)
+            self.assertGreaterEqual(requests, 3)
+            entry = await store.get("power_flow")
+            self.assertLess(entry.age, 0.35)
+            self.assertEqual(self.server.request_paths.count(path), requests)
+            self.assertEqual(list(store.snapshot()), [("power_flow", None)])
+        with self.assertRaises(ValueError):
+            await store.get("device_meter")
+        # misspelled endpoint names are rejected
+        with self.assertRaises(ValueError):
+            pyfronius.FroniusSnapshotStore(self.fronius, max_age={"powerflow": 1})
+        with self.assertRaises(ValueError):
+            pyfronius.FroniusSnapshotStore(
+                self.fronius, max_age={("power_flow", "0"): 1}
+            )
+        store = pyfronius.FroniusSnapshotStore(
+            self.fronius, max_age={"device_meter": 1, ("device_meter", "0"): 2}
+        )
+        self.assertEqual(store.max_age, {"device_meter": 1, ("device_meter", "0"): 2})
+
+    async def test_fronius_charset(self):
+        # the meter responds in the declared ISO-8859-1 charset
+        self.server.charset = "ISO-8859-1"
+        for codec in ("json", "orjson"):
+            fronius = pyfronius.Fronius(
+                self.session,
+                self.url,
+                self.api_version,
+                json_codec=pyfronius.json_codec(codec),
+            )
+            res = await fronius.current_meter_data("1")
+            self.assertEqual(res["model"], {"value": "Zähler Süd"})
+            self.assertEqual(res["power_real"], {"value": -367.722145, "unit": "W"})
+
+    async def test_fronius_snapshot_store_slow_endpoint(self):
+        endpoint_data = self.fronius._endpoint_data
+        slow = asyncio.Event()
+
+        async def slow_inverter_info(endpoint, device=None, fields=None):
+            if endpoint == "inverter_info" and slow.is_set():
+                await asyncio.sleep(1)
+            return await endpoint_data(endpoint, device, fields)
+
+        with unittest.mock.patch.object(
+            self.fronius, "_endpoint_data", slow_inverter_info
+        ):
+            async with pyfronius.FroniusSnapshotStore(
+                self.fronius, max_age={"power_flow": 0.1, "inverter_info": 0.1}
+            ) as store:
+                await store.get("power_flow")
+                await store.get("inverter_info")
+                slow.set()
+                await asyncio.sleep(0.6)
+                # the power flow is not held back by the slow inverter info
+                entry = await store.get("power_flow")
+                self.assertLess(entry.age, 0.3)
+                entry = await store.get("inverter_info")
+                self.assertGreater(entry.age, 0.5)
+
+    async def test_fronius_records(self):
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, output_format="records"
+        )
+        meter = await fronius.current_meter_data()
+        self.assertIsInstance(meter, pyfronius.MeterData)
+        self.assertEqual(meter.power_real, -367.722145)
+        self.assertEqual(pyfronius.MeterData.UNITS["power_real"], pyfronius.WATT)
+        self.assertFalse(hasattr(meter, "power_reactive"))
+        self.assertFalse(hasattr(meter, "__dict__"))
+        expected = {
+            fronius.current_power_flow: GET_POWER_FLOW_REALTIME_DATA,
+            fronius.current_meter_data: GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+            fronius.current_system_meter_data: GET_METER_REALTIME_DATA_SYSTEM,
+            fronius.current_inverter_data: GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE,
+            fronius.current_inverter_3p_data: (
+                GET_INVERTER_REALTIME_3P_DATA_SCOPE_DEVICE
+            ),
+            fronius.current_system_inverter_data: GET_INVERTER_REALTIME_DATA_SYSTEM,
+            fronius.current_storage_data: GET_STORAGE_REALTIME_DATA_SCOPE_DEVICE,
+            fronius.current_system_storage_data: GET_STORAGE_REALTIME_DATA_SYSTEM,
+            fronius.current_logger_info: GET_LOGGER_INFO,
+        }
+        for current_data, data in expected.items():
+            self.assertDictEqual(pyfronius.as_dict(await current_data()), data)
+        # custom conversions are not turned into records
+        self.assertEqual(
+            await fronius.current_power_flow(ext_cb_conversion=lambda data: {}),
+            {
+                "timestamp": GET_POWER_FLOW_REALTIME_DATA["timestamp"],
+                "status": GET_POWER_FLOW_REALTIME_DATA["status"],
+            },
+        )
+        res = await fronius.fetch(
+            active_device_info=False,
+            inverter_info=False,
+            logger_info=False,
+            power_flow=False,
+            system_inverter=False,
+            system_ohmpilot=False,
+            system_storage=False,
+            device_storage=[],
+            device_inverter=[],
+        )
+        self.assertEqual(
+            [pyfronius.as_dict(data) for data in res],
+            [
+                GET_METER_REALTIME_DATA_SYSTEM,
+                dict(
+                    GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+                    timestamp=GET_METER_REALTIME_DATA_SYSTEM["timestamp"],
+                ),
+            ],
+        )
+
+    def test_fronius_decode(self):
+        responses = SERVER_DIR.joinpath("v1", "solar_api", "v1")
+        expected = {
+            "power_flow": (
+                "GetPowerFlowRealtimeData.fcgi",
+                GET_POWER_FLOW_REALTIME_DATA,
+            ),
+            "device_meter": (
+                "GetMeterRealtimeData.cgi___Scope=Device&DeviceId=0",
+                GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+            ),
+            "system_storage": (
+                "GetStorageRealtimeData.cgi___Scope=System",
+                GET_STORAGE_REALTIME_DATA_SYSTEM,
+            ),
+            "logger_info": ("GetLoggerInfo.cgi", GET_LOGGER_INFO),
+        }
+        for endpoint, (name, data) in expected.items():
+            raw = responses.joinpath(name).read_bytes()
+            self.assertDictEqual(pyfronius.decode(endpoint, raw), data)
+            self.assertDictEqual(pyfronius.decode(endpoint, raw.decode()), data)
+
+        raw = responses.joinpath("GetMeterRealtimeData.cgi___Scope=Device&DeviceId=0")
+        raw = raw.read_bytes()
+        power_real = GET_METER_REALTIME_DATA_SCOPE_DEVICE["power_real"]["value"]
+        failed = json.loads(raw)
+        failed["Head"]["Status"]["Code"] = 8
+        results = pyfronius.decode_many(
+            "device_meter",
+            [raw, b"<html>", json.dumps(failed), raw],
+            fields=["power_real"],
+            output_format="values",
+            return_errors=True,
+        )
+        result = next(results)
+        self.assertEqual(result["power_real"], power_real)
+        self.assertEqual(set(result), {"timestamp", "status", "power_real"})
+        self.assertIsInstance(next(results), pyfronius.InvalidAnswerError)
+        self.assertEqual(next(results).code, 8)
+        self.assertEqual(next(results)["power_real"], power_real)
+        with self.assertRaises(StopIteration):
+            next(results)
+        with self.assertRaises(pyfronius.InvalidAnswerError):
+            list(pyfronius.decode_many("device_meter", [raw, b""]))
+        with self.assertRaises(ValueError):
+            pyfronius.decode("meter", raw)
+        # invalid arguments raise before any response is consumed
+        with self.assertRaises(ValueError):
+            pyfronius.decode_many("meter", [raw])
+        with self.assertRaises(ValueError):
+            pyfronius.decode_many("device_meter", [raw], output_format="json")
+        with self.assertRaises(ValueError):
+            pyfronius.decode_many("device_meter", [raw], fields=["no_such_field"])
+        with self.assertRaises(ValueError):
+            pyfronius.decode_many("device_meter", [raw], fields="power_real")
+
+    def test_fronius_schema(self):
+        def assert_described(data, schema):
+            for name, item in data.items():
+                self.assertIn(name, schema)
+                if schema[name].fields is None:
+                    continue
+                items = item if isinstance(item, list) else item.values()
+                for fields in items:
+                    assert_described(fields, schema[name].fields)
+
+        schema = pyfronius.Fronius.schema()
+        self.assertEqual(set(schema), set(pyfronius.ENDPOINTS))
+        self.assertEqual(
+            schema["device_meter"]["power_real"],
+            pyfronius.FieldSchema(pyfronius.WATT, float),
+        )
+        for endpoint, data in (
+            ("active_device_info", GET_ACTIVE_DEVICE_INFO),
+            ("inverter_info", GET_INVERTER_INFO),
+            ("logger_info", GET_LOGGER_INFO),
+            ("power_flow", GET_POWER_FLOW_REALTIME_DATA),
+            ("system_meter", GET_METER_REALTIME_DATA_SYSTEM),
+            ("system_inverter", GET_INVERTER_REALTIME_DATA_SYSTEM),
+            ("system_ohmpilot", GET_OHMPILOT_REALTIME_DATA_SYSTEM),
+            ("system_storage", GET_STORAGE_REALTIME_DATA_SYSTEM),
+            ("system_led", GET_LOGGER_LED_INFO_STATE),
+            ("device_meter", GET_METER_REALTIME_DATA_SCOPE_DEVICE),
+            ("device_storage", GET_STORAGE_REALTIME_DATA_SCOPE_DEVICE),
+            ("device_inverter", GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE),
+            ("device_inverter_3p", GET_INVERTER_REALTIME_3P_DATA_SCOPE_DEVICE),
+        ):
+            assert_described(data, schema[endpoint])
+        # modifying the returned schema does not affect the conversions
+        del schema["device_meter"]["power_real"]
+        schema["system_storage"]["storages"].fields.clear()
+        schema = pyfronius.Fronius.schema()
+        self.assertIn("power_real", schema["device_meter"])
+        self.assertIn("modules", schema["system_storage"]["storages"].fields)
+
+    async def test_fronius_values(self):
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, output_format="values"
+        )
+        self.assertEqual(
+            await fronius.current_meter_data(),
+            {
+                "timestamp": "2019-01-10T23:33:14+01:00",
+                "status": {"Code": 0, "Reason": "", "UserMessage": ""},
+                "power_real": -367.722145,
+                "meter_location": 1,
+                "enable": 1,
+                "visible": 1,
+                "manufacturer": "Fronius",
+                "model": "",
+                "serial": "",
+            },
+        )
+        system = await fronius.current_system_meter_data()
+        self.assertEqual(system["meters"]["0"]["power_real"], -367.722145)
+        # units set by the device are kept
+        logger_info = await fronius.current_logger_info()
+        self.assertEqual(logger_info["co2_factor"], GET_LOGGER_INFO["co2_factor"])
+        self.assertEqual(logger_info["hardware_version"], "2.4E")
+        res = await fronius.fetch(
+            active_device_info=False,
+            inverter_info=False,
+            logger_info=False,
+            system_meter=False,
+            system_inverter=False,
+            system_ohmpilot=False,
+            system_storage=False,
+            device_meter=[],
+            device_storage=[],
+        )
+        self.assertEqual(res[0]["power_grid"], 367.722145)
+        self.assertEqual(res[1]["energy_total"], 26213502)
+        self.assertEqual(res[2]["voltage_ac_phase_1"], 231.87258911132812)
+
+    async def test_fronius_fields(self):
+        res = await self.fronius.current_power_flow(fields=["power_grid"])
+        self.assertEqual(
+            res,
+            {
+                "timestamp": GET_POWER_FLOW_REALTIME_DATA["timestamp"],
+                "status": GET_POWER_FLOW_REALTIME_DATA["status"],
+                "power_grid": GET_POWER_FLOW_REALTIME_DATA["power_grid"],
+            },
+        )
+        res = await self.fronius.current_system_meter_data(fields={"power_real"})
+        self.assertEqual(
+            res["meters"],
+            {"0": {"power_real": {"value": -367.722145, "unit": pyfronius.WATT}}},
+        )
+        res = await self.fronius.current_inverter_data(fields=["energy_total"])
+        self.assertEqual(list(res), ["timestamp", "status", "energy_total"])
+        res = await self.fronius.current_storage_data(fields=["state_of_charge"])
+        self.assertEqual(res["state_of_charge"], {"value": 8, "unit": "%"})
+        self.assertEqual(res["modules"], {})
+        # per inverter fields are only converted if requested
+        with unittest.mock.patch.object(
+            pyfronius.Fronius, "_power_flow_inverters", side_effect=AssertionError
+        ):
+            res = await self.fronius.fetch(
+                active_device_info=False,
+                inverter_info=False,
+                logger_info=False,
+                system_inverter=False,
+                system_ohmpilot=False,
+                system_storage=False,
+                device_storage=[],
+                device_inverter=[],
+                fields=["power_grid", "power_real"],
+            )
+        for data in res:
+            del data["timestamp"], data["status"]
+        self.assertEqual(
+            res,
+            [
+                {"power_grid": GET_POWER_FLOW_REALTIME_DATA["power_grid"]},
+                {"meters": {"0": {"power_real": {"value": -367.722145, "unit": "W"}}}},
+                {"power_real": {"value": -367.722145, "unit": "W"}},
+            ],
+        )
+
+    async def test_fronius_fields_invalid(self):
+        # unknown names and a single name as str are rejected
+        with self.assertRaises(ValueError):
+            await self.fronius.current_power_flow(fields=["no_such_field"])
+        with self.assertRaises(ValueError):
+            await self.fronius.current_meter_data(fields="power_real")
+        with self.assertRaises(ValueError):
+            await self.fronius.current_power_flow(fields=["power_real"])
+        with self.assertRaises(ValueError):
+            await self.fronius.fetch(fields=["power_grid", "no_such_field"])
+        self.assertEqual(self.server.request_paths, [])
+        # per inverter and item fields are known
+        res = await self.fronius.current_power_flow(fields=["state_of_charge_0"])
+        self.assertEqual(list(res), ["timestamp", "status"])
+        res = await self.fronius.current_system_storage_data(fields=["modules"])
+        self.assertIn("modules", res["storages"]["0"])
+
+    async def test_fronius_fields_all(self):
+        # requesting all fields converts as without projection
+        schema = pyfronius.Fronius.schema()
+        f = self.fronius
+        for current_data, endpoint, data in (
+            (f.current_power_flow, "power_flow", GET_POWER_FLOW_REALTIME_DATA),
+            (
+                f.current_meter_data,
+                "device_meter",
+                GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+            ),
+            (
+                f.current_system_meter_data,
+                "system_meter",
+                GET_METER_REALTIME_DATA_SYSTEM,
+            ),
+            (
+                f.current_system_storage_data,
+                "system_storage",
+                GET_STORAGE_REALTIME_DATA_SYSTEM,
+            ),
+            (
+                f.current_system_inverter_data,
+                "system_inverter",
+                GET_INVERTER_REALTIME_DATA_SYSTEM,
+            ),
+            (
+                f.current_system_ohmpilot_data,
+                "system_ohmpilot",
+                GET_OHMPILOT_REALTIME_DATA_SYSTEM,
+            ),
+            (f.current_logger_info, "logger_info", GET_LOGGER_INFO),
+            (f.inverter_info, "inverter_info", GET_INVERTER_INFO),
+        ):
+            fields = set(schema[endpoint])
+            for field in schema[endpoint].values():
+                fields.update(field.fields or ())
+            self.assertDictEqual(await current_data(fields=fields), data)
+
+    def test_fronius_field_alias(self):
+        # Gen24 keys take precedence regardless of their position
+        data = {"SMARTMETER_POWERACTIVE_01_F64": 2.0, "PowerReal_P_Phase_1": 1.0}
+        self.assertEqual(
+            pyfronius.Fronius._device_meter_data(data),
+            {"power_real_phase_1": {"value": 2.0, "unit": pyfronius.WATT}},
+        )
+
+    async def test_fronius_skip_unsupported(self):
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, unsupported_backoff=60
+        )
+        for _ in range(2):
+            with self.assertRaises(pyfronius.NotSupportedError):
+                await fronius.current_storage_data("1")
+        self.assertTrue(fronius.is_unsupported("device_storage", "1"))
+        self.assertFalse(fronius.is_unsupported("device_storage", "0"))
+        self.assertEqual(
+            self.server.request_paths.count(
+                "/solar_api/v1/GetStorageRealtimeData.cgi?Scope=Device&DeviceId=1"
+            ),
+            1,
+        )
+        res = await fronius.fetch(
+            active_device_info=False,
+            inverter_info=False,
+            logger_info=False,
+            power_flow=False,
+            system_meter=False,
+            system_inverter=False,
+            system_ohmpilot=False,
+            system_storage=False,
+            device_meter=[],
+            device_storage=["0", "1"],
+            device_inverter=[],
+        )
+        self.assertEqual(res, [GET_STORAGE_REALTIME_DATA_SCOPE_DEVICE])
+        self.assertEqual(res.failed, [])
+        self.assertEqual(res.skipped, [("device_storage", "1")])
+
+    async def test_fronius_skip_sleeping_inverter(self):
+        fronius = pyfronius.Fronius(
+            self.session, self.url, self.api_version, unsupported_backoff=60
+        )
+
+        async def not_available(fun, endpoint, *devices):
+            raise pyfronius.BadStatusError("url", 12)
+
+        with unittest.mock.patch.object(fronius, "_cached_data", not_available):
+            for _ in range(3):
+                for endpoint, device in (
+                    ("device_inverter", "1"),
+                    ("device_storage", "0"),
+                ):
+                    with self.assertRaises(pyfronius.BadStatusError):
+                        await fronius._endpoint_data(endpoint, device)
+                    # probe again right away
+                    key = (endpoint, (device,))
+                    fronius._unsupported[key] = (fronius._unsupported[key][0], 0)
+        # sleeping inverters are not backed off longer every night
+        self.assertEqual(fronius._unsupported[("device_inverter", ("1",))][0], 1)
+        self.assertEqual(fronius._unsupported[("device_storage", ("0",))][0], 3)
+
+        # production clears the back-off of the inverters
+        fronius._unsupported[("device_inverter", ("1",))] = (1, time.monotonic() + 60)
+        states = iter([True, False])
+        with unittest.mock.patch.object(
+            pyfronius.Fronius,
+            "_inverters_idle",
+            staticmethod(lambda snapshot, idle: next(states, False)),
+        ):
+            polls = fronius.poll({"power_flow": 0.05}, idle_factor=2)
+            for _ in range(2):
+                await polls.__anext__()
+            await polls.aclose()
+        self.assertFalse(fronius.is_unsupported("device_inverter", "1"))
+        self.assertIn(("device_storage", ("0",)), fronius._unsupported)
+
+    async def test_fronius_fetch_auto_plan(self):
+        for _ in range(2):
+            res = await self.fronius.fetch(plan="auto")
+            self.assertEqual(
+                res,
+                [
+                    GET_ACTIVE_DEVICE_INFO,
+                    GET_INVERTER_INFO,
+                    GET_LOGGER_INFO,
+                    GET_POWER_FLOW_REALTIME_DATA,
+                    GET_METER_REALTIME_DATA_SYSTEM,
+                    GET_INVERTER_REALTIME_DATA_SYSTEM,
+                    dict(
+                        GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+                        timestamp=GET_METER_REALTIME_DATA_SYSTEM["timestamp"],
+                    ),
+                    GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE,
+                    GET_INVERTER_REALTIME_3P_DATA_SCOPE_DEVICE,
+                ],
+            )
+        # the active device info is not requested again for planning
+        self.assertEqual(
+            self.server.request_paths.count(
+                "/solar_api/v1/GetActiveDeviceInfo.cgi?DeviceClass=System"
+            ),
+            2,
+        )
+
     async def test_fronius_fetch(self):
         res = await self.fronius.fetch(
             active_device_info=True,
@@ -252,12 +1222,39 @@ class FroniusWebTestV1(AsyncTestCaseSetup):
                 GET_METER_REALTIME_DATA_SYSTEM,
                 GET_INVERTER_REALTIME_DATA_SYSTEM,
                 GET_OHMPILOT_REALTIME_DATA_SYSTEM,
-                GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+                # derived from the system meter response
+                dict(
+                    GET_METER_REALTIME_DATA_SCOPE_DEVICE,
+                    timestamp=GET_METER_REALTIME_DATA_SYSTEM["timestamp"],
+                ),
                 GET_STORAGE_REALTIME_DATA_SCOPE_DEVICE,
                 GET_INVERTER_REALTIME_DATA_SCOPE_DEVICE,
                 GET_INVERTER_REALTIME_3P_DATA_SCOPE_DEVICE,
             ],
         )
+        self.assertNotIn(
+            "/solar_api/v1/GetMeterRealtimeData.cgi?Scope=Device&DeviceId=0",
+            self.server.request_paths,
+        )
+
+    async def test_fronius_fetch_device_scope(self):
+        res = await self.fronius.fetch(
+            active_device_info=False,
+            inverter_info=False,
+            logger_info=False,
+            power_flow=False,
+            system_meter=True,
+            system_inverter=False,
+            system_ohmpilot=False,
+            system_storage=False,
+            device_meter=["0"],
+            device_storage=[],
+            device_inverter=[],
+            derive_device_scope=False,
+        )
+        self.assertEqual(
+            res, [GET_METER_REALTIME_DATA_SYSTEM, GET_METER_REALTIME_DATA_SCOPE_DEVICE]
+        )
 
     async def tearDown(self):
         await self.session.close()
@@ -265,5 +1262,85 @@ class FroniusWebTestV1(AsyncTestCaseSetup):
         pass
 
 
+class FroniusFleetTestV1(AsyncTestCaseSetup):
+    server = None
+    api_version = pyfronius.API_VERSION.V1
+    server_control = None
+    port = 0
+    url = "http://localhost:80"
+    session = None
+    fronius = None
+
+    setUp = FroniusWebTestV1.setUp
+
+    async def test_fleet_fetch(self):
+        dead_url = "http://{}:{}".format(ADDRESS, _get_unused_port())
+        fleet = pyfronius.FroniusFleet(
+            self.session,
+            [self.url, dead_url],
+            self.api_version,
+            max_in_flight=1,
+            jitter=0.01,
+        )
+        results = {}
+        async for host, res in fleet.fetch(
+            active_device_info=False,
+            inverter_info=False,
+            logger_info=False,
+            power_flow=True,
+            system_meter=False,
+            system_inverter=False,
+            system_ohmpilot=False,
+            system_storage=False,
+            device_meter=[],
+            device_storage=[],
+            device_inverter=[],
+        ):
+            results[host] = res
+        self.assertEqual(
+            results, {self.url: [GET_POWER_FLOW_REALTIME_DATA], dead_url: []}
+        )
+        self.assertEqual(results[dead_url].failed, [("power_flow", None)])
+        self.assertEqual(fleet.last_cycle.polled, 2)
+        self.assertEqual(fleet.last_cycle.skipped, 0)
+        self.assertEqual(fleet.last_cycle.failed, 1)
+        self.assertGreater(fleet.last_cycle.wall_time, 0)
+
+    async def test_fleet_fronius_options(self):
+        fleet = pyfronius.FroniusFleet(
+            self.session,
+            [self.url],
+            self.api_version,
+            fronius_options={"max_in_flight": 2, "breaker_threshold": 3},
+        )
+        fronius = fleet.fronii[self.url]
+        self.assertEqual(fronius.limiter.max_in_flight, 2)
+        self.assertEqual(fronius.circuit_breaker.failure_threshold, 3)
+        async for _, res in fleet.fetch():
+            self.assertEqual(res.failed, [])
+        self.assertEqual(fleet.last_cycle.failed, 0)
+        self.assertGreater(fronius.limiter.queued, 0)
+
+    async def test_fleet_skip_busy_host(self):
+        fleet = pyfronius.FroniusFleet(
+            self.session, [self.url], self.api_version, jitter=0.1
+        )
+
+        async def cycle():
+            return [res async for res in fleet.fetch(power_flow=True)]
+
+        first = asyncio.ensure_future(cycle())
+        # let the first cycle start before the second one
+        await asyncio.sleep(0)
+        self.assertEqual(await cycle(), [])
+        self.assertEqual(fleet.last_cycle.skipped, 1)
+        self.assertEqual(len(await first), 1)
+        self.assertEqual(fleet.last_cycle.skipped, 0)
+
+    async def tearDown(self):
+        await self.session.close()
+        self.server_control.stop_server()
+
+
 if __name__ == "__main__":
     unittest.main()
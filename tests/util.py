@@ -5,6 +5,8 @@ import socket
 import aiounittest
 from aiounittest import async_test
 
+import pyfronius
+
 ADDRESS = "localhost"
 
 
@@ -20,6 +22,8 @@ class AsyncTestCaseSetup(aiounittest.AsyncTestCase):
         if name.startswith("test_") and asyncio.iscoroutinefunction(attr):
 
             async def wrapped_attr():
+                # mock servers of different API versions may reuse a port
+                pyfronius.Fronius.clear_api_version_cache()
                 await self.setUp()
                 await attr()
                 await self.tearDown()